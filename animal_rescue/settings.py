@@ -4,6 +4,8 @@ Django settings for animal_rescue project.
 
 from pathlib import Path
 import os
+import tempfile
+import urllib.parse
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,10 +47,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'rescue.db_router.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'rescue.identity.IdentityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -194,6 +198,13 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'home'
 
+# Sessions load the user and their shelter in one query (rescue/identity.py).
+# ModelBackend stays listed so sessions created before it keep working.
+AUTHENTICATION_BACKENDS = [
+    'rescue.identity.ShelterAwareBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 # Logging configuration to see errors in Render logs
 LOGGING = {
     'version': 1,
@@ -221,3 +232,156 @@ LOGGING = {
     },
 }
 
+
+# Nearby-shelter spatial index (rescue/spatial_index.py)
+# Grid cell size in degrees, and how often each worker rebuilds its copy
+# to pick up shelters saved by other processes (0 disables the rebuild)
+SHELTER_INDEX_CELL_DEGREES = config('SHELTER_INDEX_CELL_DEGREES', default=0.5, cast=float)
+SHELTER_INDEX_TTL = config('SHELTER_INDEX_TTL', default=300, cast=int)
+
+# Rows per INSERT when fanning out notifications with bulk_create
+NOTIFICATION_BULK_BATCH_SIZE = config('NOTIFICATION_BULK_BATCH_SIZE', default=500, cast=int)
+
+# Background job queue (rescue/jobs.py, run with `python manage.py rescue_worker`)
+# Set RESCUE_JOBS_EAGER=True to run jobs inline when no worker is running
+RESCUE_JOBS_EAGER = config('RESCUE_JOBS_EAGER', default=False, cast=bool)
+RESCUE_JOBS_RETRY_BASE_SECONDS = config('RESCUE_JOBS_RETRY_BASE_SECONDS', default=30, cast=int)
+RESCUE_JOBS_RETRY_MAX_SECONDS = config('RESCUE_JOBS_RETRY_MAX_SECONDS', default=3600, cast=int)
+# A job still "running" after this long is assumed orphaned and re-claimed
+RESCUE_JOBS_VISIBILITY_TIMEOUT = config('RESCUE_JOBS_VISIBILITY_TIMEOUT', default=300, cast=int)
+
+# Geocoding cache (rescue/geocoding.py): TTLs in seconds for resolved and
+# unresolved addresses, and entries kept in each process's in-memory LRU
+GEOCODE_CACHE_TTL = config('GEOCODE_CACHE_TTL', default=30 * 24 * 3600, cast=int)
+GEOCODE_NEGATIVE_TTL = config('GEOCODE_NEGATIVE_TTL', default=24 * 3600, cast=int)
+GEOCODE_LRU_SIZE = config('GEOCODE_LRU_SIZE', default=1024, cast=int)
+
+# Geocoder backend (rescue/geocoder_backends.py). Use
+# rescue.geocoder_backends.OfflineGazetteerGeocoder with GEOCODER_GAZETTEER_PATH
+# for tests and air-gapped deployments
+GEOCODER_BACKEND = config('GEOCODER_BACKEND', default='rescue.geocoder_backends.NominatimGeocoder')
+GEOCODER_GAZETTEER_PATH = config('GEOCODER_GAZETTEER_PATH', default=str(BASE_DIR / 'rescue' / 'data' / 'gazetteer.csv'))
+GEOCODER_OPTIONS = {}
+# Nominatim usage policy: at most 1 request per second per application,
+# enforced across every process through the RateLimit table
+GEOCODER_RATE_LIMIT = config('GEOCODER_RATE_LIMIT', default=1.0, cast=float)
+# Longest a caller waits for a rate-limit slot before giving up
+GEOCODER_MAX_WAIT = config('GEOCODER_MAX_WAIT', default=5, cast=float)
+# Consecutive provider failures before the circuit opens, and how long it stays open
+GEOCODER_FAILURE_THRESHOLD = config('GEOCODER_FAILURE_THRESHOLD', default=3, cast=int)
+GEOCODER_RESET_TIMEOUT = config('GEOCODER_RESET_TIMEOUT', default=60, cast=int)
+
+# Recognition results kept in each process's in-memory LRU (rescue/recognition_cache.py)
+RECOGNITION_LRU_SIZE = config('RECOGNITION_LRU_SIZE', default=512, cast=int)
+# Warm the recognizer in each gunicorn worker after fork (gunicorn.conf.py).
+# Only worth it when web workers run recognition jobs inline
+RECOGNIZER_WARM_UP = config('RECOGNIZER_WARM_UP', default=RESCUE_JOBS_EAGER, cast=bool)
+
+# Image recognition backends (rescue/recognition_backends.py) in order of
+# preference; the first one available is used
+recognition_backends_str = config('RECOGNITION_BACKENDS', default='tensorflow,numpy,opencv,pil')
+RECOGNITION_BACKENDS = [b.strip() for b in recognition_backends_str.split(',') if b.strip()]
+# Weights for the numpy backend, built with `python manage.py build_numpy_classifier`
+RECOGNITION_NUMPY_WEIGHTS = config('RECOGNITION_NUMPY_WEIGHTS', default=str(BASE_DIR / 'rescue' / 'data' / 'numpy_classifier.npz'))
+# Keras model file for the tensorflow backend
+RECOGNITION_TF_MODEL = config('RECOGNITION_TF_MODEL', default='')
+
+# Similar-photo index (rescue/photo_index.py): seconds before a process
+# rebuilds its copy, and Hamming distances (of 64 bits) for "similar" photos
+# and for flagging a report as a repost of an earlier one
+PHOTO_INDEX_TTL = config('PHOTO_INDEX_TTL', default=300, cast=int)
+PHOTO_MATCH_DISTANCE = config('PHOTO_MATCH_DISTANCE', default=10, cast=int)
+PHOTO_DUPLICATE_DISTANCE = config('PHOTO_DUPLICATE_DISTANCE', default=4, cast=int)
+# Hashes with fewer than this many bits set (or clear) come from blank or
+# flat photos that all look alike, so they are never matched
+PHOTO_HASH_MIN_BITS = config('PHOTO_HASH_MIN_BITS', default=8, cast=int)
+
+# Lost/found report matching (rescue/matching.py): reports of the opposite
+# kind within MATCH_RADIUS_KM and MATCH_WINDOW_DAYS are scored, and pairs
+# scoring at least MATCH_MIN_SCORE (0-1) are stored. Changing the cell or
+# bucket size requires `python manage.py match_reports`
+MATCH_RADIUS_KM = config('MATCH_RADIUS_KM', default=25, cast=float)
+MATCH_WINDOW_DAYS = config('MATCH_WINDOW_DAYS', default=30, cast=int)
+MATCH_MIN_SCORE = config('MATCH_MIN_SCORE', default=0.4, cast=float)
+MATCH_CELL_DEGREES = config('MATCH_CELL_DEGREES', default=0.25, cast=float)
+MATCH_TIME_BUCKET_DAYS = config('MATCH_TIME_BUCKET_DAYS', default=7, cast=int)
+
+# Photo ingestion (rescue/ingestion.py): uploads are downscaled to
+# PHOTO_MAX_DIMENSION on the long side, stripped of metadata and re-encoded
+# as JPEG. PHOTO_MAX_PIXELS caps JPEG dimensions (decoded at reduced scale);
+# other formats are decoded in full, so they get a lower cap
+PHOTO_MAX_UPLOAD_BYTES = config('PHOTO_MAX_UPLOAD_BYTES', default=15 * 1024 * 1024, cast=int)
+PHOTO_MAX_DIMENSION = config('PHOTO_MAX_DIMENSION', default=2048, cast=int)
+PHOTO_JPEG_QUALITY = config('PHOTO_JPEG_QUALITY', default=85, cast=int)
+PHOTO_MAX_PIXELS = config('PHOTO_MAX_PIXELS', default=50_000_000, cast=int)
+PHOTO_MAX_FULL_DECODE_PIXELS = config('PHOTO_MAX_FULL_DECODE_PIXELS', default=16_000_000, cast=int)
+# Uploads larger than this are spooled to a temporary file, not held in memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = config('FILE_UPLOAD_MAX_MEMORY_SIZE', default=2 * 1024 * 1024, cast=int)
+# Report photos' EXIF GPS replaces address geocoding when the photo was taken
+# within PHOTO_GPS_MAX_AGE_DAYS and the fix is at least this accurate
+PHOTO_GPS_MAX_AGE_DAYS = config('PHOTO_GPS_MAX_AGE_DAYS', default=3, cast=int)
+PHOTO_GPS_MAX_ERROR_METERS = config('PHOTO_GPS_MAX_ERROR_METERS', default=500, cast=float)
+
+# Keyset pagination (rescue/pagination.py): list totals are counted up to
+# this many rows and shown as "1000+" beyond it; 0 hides them
+PAGINATION_COUNT_LIMIT = config('PAGINATION_COUNT_LIMIT', default=1000, cast=int)
+
+# Cache (sessions and the per-user identity cache). CACHE_URL picks the backend:
+#   file:///path (default: a directory under the system temp dir, shared by
+#   every process on the host), locmem:// (per process), redis://host:6379/0
+#   (or any Redis-compatible server; needs the redis package), dummy://
+CACHE_URL = config('CACHE_URL', default='')
+_cache_url = urllib.parse.urlparse(CACHE_URL) if CACHE_URL else None
+if _cache_url is None or _cache_url.scheme == 'file':
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': _cache_url.path if _cache_url else os.path.join(tempfile.gettempdir(), 'animal_rescue_cache'),
+    }}
+elif _cache_url.scheme == 'locmem':
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+elif _cache_url.scheme in ('redis', 'rediss'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}}
+elif _cache_url.scheme == 'dummy':
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+else:
+    raise ValueError(f"Unsupported CACHE_URL scheme: {_cache_url.scheme}")
+
+# Sessions are read from the cache and written through to the database
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.cached_db')
+# Seconds a logged-in user (with their shelter) is served from the cache; 0 disables
+USER_CACHE_TTL = config('USER_CACHE_TTL', default=300, cast=int)
+# Seconds between purge_expired_sessions runs in the worker; 0 disables
+SESSION_PURGE_INTERVAL = config('SESSION_PURGE_INTERVAL', default=6 * 3600, cast=int)
+
+# Read replicas (rescue/db_router.py): comma-separated database URLs, each
+# added as replica_1, replica_2, ... postgres://... URLs use the same options
+# as DATABASE_URL; sqlite:///path (relative to the project) is for local
+# testing, kept in sync with `python manage.py sync_sqlite_replica`
+DATABASE_REPLICA_URLS = config('DATABASE_REPLICA_URLS', default='')
+DATABASE_REPLICAS = []
+for _i, _replica_url in enumerate(filter(None, (u.strip() for u in DATABASE_REPLICA_URLS.split(','))), start=1):
+    _url = urllib.parse.urlparse(_replica_url)
+    if _url.scheme == 'sqlite':
+        # sqlite:///name is relative to the project, sqlite:////abs/name absolute
+        _path = _url.path[1:] if _url.path.startswith('//') else BASE_DIR / _url.path.lstrip('/')
+        _replica = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': _path}
+    elif _url.scheme in ('postgres', 'postgresql'):
+        _replica = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': _url.path.lstrip('/'),
+            'USER': _url.username,
+            'PASSWORD': _url.password,
+            'HOST': _url.hostname,
+            'PORT': _url.port or '5432',
+            'OPTIONS': {'sslmode': 'require'},
+            'CONN_MAX_AGE': 600,
+        }
+    else:
+        raise ValueError(f"Unsupported DATABASE_REPLICA_URLS scheme: {_url.scheme}")
+    # Tests read the primary through replica aliases rather than creating copies
+    _replica['TEST'] = {'MIRROR': 'default'}
+    DATABASES[f'replica_{_i}'] = _replica
+    DATABASE_REPLICAS.append(f'replica_{_i}')
+DATABASE_ROUTERS = ['rescue.db_router.ReadReplicaRouter']
+# Seconds a browser that just wrote keeps reading from the primary
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
@@ -0,0 +1,15 @@
+"""
+Gunicorn configuration, picked up automatically from the working directory
+The recognizer is built lazily, so warm it in each worker after fork
+(when RECOGNIZER_WARM_UP is set) rather than on a user's first upload.
+"""
+
+
+def post_worker_init(worker):
+    from django.conf import settings
+
+    if getattr(settings, 'RECOGNIZER_WARM_UP', False):
+        from rescue.ai_recognition import warm_up
+
+        recognizer = warm_up()
+        worker.log.info(f"Recognizer warmed up ({recognizer.version})")
@@ -1,10 +1,11 @@
 from django.contrib import admin
-from .models import Shelter, Animal, Report, AdoptionRequest, Update, Notification
+from .models import Shelter, Animal, Report, AdoptionRequest, Update, Notification, Job, GeocodeCache, RecognitionCache, ReportMatch
 
 
 @admin.register(Shelter)
 class ShelterAdmin(admin.ModelAdmin):
-    list_display = ['name', 'city', 'state', 'phone', 'email']
+    list_display = ['name', 'city', 'state', 'phone', 'email', 'location_status', 'unread_notification_count']
+    list_filter = ['location_status']
     search_fields = ['name', 'city', 'state']
 
 
@@ -17,9 +18,10 @@ class AnimalAdmin(admin.ModelAdmin):
 
 @admin.register(Report)
 class ReportAdmin(admin.ModelAdmin):
-    list_display = ['report_type', 'animal_type', 'location', 'status', 'reported_by', 'created_at']
-    list_filter = ['report_type', 'animal_type', 'status']
+    list_display = ['report_type', 'animal_type', 'location', 'status', 'location_status', 'reported_by', 'created_at']
+    list_filter = ['report_type', 'animal_type', 'status', 'location_status']
     search_fields = ['location', 'description']
+    raw_id_fields = ['duplicate_of']
 
 
 @admin.register(AdoptionRequest)
@@ -44,3 +46,30 @@ class NotificationAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
 
 
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_after', 'locked_by', 'updated_at']
+    list_filter = ['name', 'status']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(GeocodeCache)
+class GeocodeCacheAdmin(admin.ModelAdmin):
+    list_display = ['query', 'found', 'latitude', 'longitude', 'expires_at']
+    list_filter = ['found']
+    search_fields = ['query']
+    readonly_fields = ['key', 'created_at', 'updated_at']
+
+
+@admin.register(RecognitionCache)
+class RecognitionCacheAdmin(admin.ModelAdmin):
+    list_display = ['content_hash', 'classifier_version', 'animal_type', 'confidence', 'created_at']
+    list_filter = ['classifier_version', 'animal_type']
+    search_fields = ['content_hash']
+    readonly_fields = ['created_at']
+
+
+@admin.register(ReportMatch)
+class ReportMatchAdmin(admin.ModelAdmin):
+    list_display = ['lost_report', 'found_report', 'score', 'distance_km', 'updated_at']
+    raw_id_fields = ['lost_report', 'found_report']
@@ -4,33 +4,25 @@ Uses PIL/Pillow for basic image processing (lightweight alternative to OpenCV)
 TensorFlow, OpenCV, and NumPy are optional and can be added later for advanced ML model support
 """
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image, ImageStat
 
-# Optional NumPy import (only needed for advanced ML processing)
-try:
-    import numpy as np
-    NUMPY_AVAILABLE = True
-except ImportError:
-    NUMPY_AVAILABLE = False
-    np = None
-
-# Optional OpenCV import (for advanced image processing)
-try:
-    import cv2
-    OPENCV_AVAILABLE = True
-except ImportError:
-    OPENCV_AVAILABLE = False
-    cv2 = None
-
-# Optional TensorFlow import (for future ML model support)
-try:
-    from tensorflow import keras
-    from tensorflow.keras.preprocessing import image
-    TENSORFLOW_AVAILABLE = True
-except ImportError:
-    TENSORFLOW_AVAILABLE = False
-    keras = None
-    image = None
+# Optional libraries are imported lazily; the classifiers themselves live in
+# rescue/recognition_backends.py
+from .recognition_backends import ANIMAL_CLASSES, backend_available, load_backend, select_backend
+
+
+def _decode_for_batch(image_path, target_size):
+    """
+    Process-pool worker for recognize_batch: decode one image at target_size
+    Returns (original_size, decoded_size, RGB bytes) or None if it cannot be read
+    """
+    try:
+        img, original_size = AnimalRecognizer.load_image(image_path, target_size=target_size)
+        return original_size, img.size, img.tobytes()
+    except Exception:
+        return None
 
 
 class AnimalRecognizer:
@@ -39,33 +31,48 @@ class AnimalRecognizer:
     For production, you would use a more sophisticated model
     """
     
-    def __init__(self):
-        self.animal_classes = ['dog', 'cat', 'bird', 'rabbit', 'other']
-        self.model = None
-        self._load_model()
+    # Photos are decoded at (at least) this size for analysis
+    analysis_size = (512, 512)
     
-    def _load_model(self):
+    def __init__(self, backend=None):
+        self.animal_classes = list(ANIMAL_CLASSES)
+        # First available backend in settings.RECOGNITION_BACKENDS order
+        self.backend = backend or select_backend()
+    
+    @property
+    def version(self):
+        """Identifies the classifier producing results, for cache keys"""
+        return f"{self.backend.name}-{self.backend.version}"
+    
+    @staticmethod
+    def load_image(image_path, target_size=None):
         """
-        Load a simple model for animal recognition
-        In production, you would load a pre-trained model here
-        For now, we'll use basic image processing as a placeholder
+        Decode an image once, at roughly target_size
+        JPEGs use draft mode so the decoder itself scales by 1/2, 1/4 or 1/8
+        (never below target_size) instead of materialising every pixel;
+        other formats are reduced by an integer factor after decoding.
+        Returns (RGB PIL image, original (width, height))
         """
-        try:
-            # In a real implementation, you would load a pre-trained model
-            # For example: self.model = keras.models.load_model('animal_classifier.h5')
-            pass
-        except Exception as e:
-            print(f"Model loading error: {e}")
-            self.model = None
+        target_size = target_size or AnimalRecognizer.analysis_size
+        img = Image.open(image_path)
+        original_size = img.size
+        if img.format == 'JPEG':
+            img.draft('RGB', target_size)
+        else:
+            factor = min(img.width // target_size[0], img.height // target_size[1])
+            if factor > 1:
+                img = img.reduce(factor)
+        return img.convert('RGB'), original_size
     
-    def preprocess_image(self, image_path):
+    def preprocess_image(self, image_path, img=None):
         """Preprocess image for model input"""
         try:
-            img = Image.open(image_path)
-            img = img.convert('RGB')
+            if img is None:
+                img, _ = self.load_image(image_path, target_size=(224, 224))
             img = img.resize((224, 224))
             # Use numpy if available, otherwise return PIL Image
-            if NUMPY_AVAILABLE and np:
+            np = load_backend('numpy')
+            if np:
                 img_array = np.array(img)
                 img_array = np.expand_dims(img_array, axis=0)
                 img_array = img_array / 255.0
@@ -76,6 +83,29 @@ class AnimalRecognizer:
             print(f"Image preprocessing error: {e}")
             return None
     
+    def analyze(self, image_path):
+        """
+        Classify an image and detect its features from a single decode
+        Returns: {'animal_type': ..., 'confidence': ..., 'features': {...}}
+        """
+        result = {
+            'animal_type': None,
+            'confidence': 0.0,
+            'features': self._empty_features(),
+        }
+        if not os.path.exists(image_path):
+            return result
+        
+        try:
+            img, original_size = self.load_image(image_path)
+        except Exception as e:
+            print(f"Image decoding error: {e}")
+            return result
+        
+        result['animal_type'], result['confidence'] = self._classify(img, original_size)
+        result['features'] = self._detect_features(img, original_size)
+        return result
+    
     def recognize_animal(self, image_path):
         """
         Recognize animal type from image
@@ -85,54 +115,59 @@ class AnimalRecognizer:
             return None, 0.0
         
         try:
-            # Use TensorFlow model if available
-            if self.model and TENSORFLOW_AVAILABLE and NUMPY_AVAILABLE:
-                processed_img = self.preprocess_image(image_path)
-                if processed_img is not None and NUMPY_AVAILABLE and np:
-                    predictions = self.model.predict(processed_img, verbose=0)
-                    class_idx = np.argmax(predictions[0])
-                    confidence = float(predictions[0][class_idx])
-                    animal_type = self.animal_classes[class_idx] if class_idx < len(self.animal_classes) else 'other'
-                    return animal_type, confidence
-            
-            # Use OpenCV if available for advanced processing
-            if OPENCV_AVAILABLE and cv2:
-                img = cv2.imread(image_path)
-                if img is not None:
-                    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-                    edges = cv2.Canny(gray, 50, 150)
-                    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                    area = cv2.contourArea(max(contours, key=cv2.contourArea)) if contours else 0
-                    aspect_ratio = img.shape[1] / img.shape[0] if img.shape[0] > 0 else 1
-                    
-                    if area > 10000:
-                        if aspect_ratio > 1.2:
-                            return 'dog', 0.65
-                        else:
-                            return 'cat', 0.60
-                    elif area > 5000:
-                        return 'rabbit', 0.55
-                    else:
-                        return 'bird', 0.50
-            
-            # Fallback: Basic PIL-based heuristic classification (lightweight)
-            img = Image.open(image_path)
-            img = img.convert('RGB')
-            width, height = img.size
-            aspect_ratio = width / height if height > 0 else 1
-            area = width * height
-            
-            # Basic heuristics based on image size and aspect ratio
-            if area > 1000000:  # Large images
-                if aspect_ratio > 1.2:
-                    return 'dog', 0.60
-                else:
-                    return 'cat', 0.55
-            elif area > 500000:
-                return 'rabbit', 0.50
-            else:
-                return 'bird', 0.45
-                
+            img, original_size = self.load_image(image_path)
+        except Exception as e:
+            print(f"Recognition error: {e}")
+            return None, 0.0
+        return self._classify(img, original_size)
+    
+    def recognize_batch(self, image_paths, workers=None, batch_size=32, executor=None):
+        """
+        Recognize many images; returns [(animal_type, confidence), ...] in input order
+        Decoding (the expensive part) runs in a process pool: pass `executor`
+        to reuse one across calls, or `workers` to size a temporary pool
+        (workers=1 decodes in-process). Decoded images are handed to the
+        backend batch_size at a time.
+        """
+        image_paths = list(image_paths)
+        if not image_paths:
+            return []
+        
+        target_sizes = [self.analysis_size] * len(image_paths)
+        if executor is not None:
+            decoded = list(executor.map(_decode_for_batch, image_paths, target_sizes, chunksize=4))
+        elif workers == 1:
+            decoded = list(map(_decode_for_batch, image_paths, target_sizes))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                decoded = list(pool.map(_decode_for_batch, image_paths, target_sizes, chunksize=4))
+        
+        results = []
+        for start in range(0, len(image_paths), batch_size):
+            batch = []
+            for item in decoded[start:start + batch_size]:
+                if item is None:
+                    batch.append(None)
+                    continue
+                original_size, size, data = item
+                batch.append((Image.frombytes('RGB', size, data), original_size))
+            results.extend(self._classify_batch(batch))
+        return results
+    
+    def _classify_batch(self, batch):
+        """Classify decoded (image, original_size) items; None items fail"""
+        ready = [item for item in batch if item is not None]
+        try:
+            predictions = iter(self.backend.classify_batch(ready) if ready else [])
+        except Exception as e:
+            print(f"Recognition error: {e}")
+            return [(None, 0.0)] * len(batch)
+        return [next(predictions) if item is not None else (None, 0.0) for item in batch]
+    
+    def _classify(self, img, original_size):
+        """Classify an already decoded RGB image; original_size is the upload's size"""
+        try:
+            return self.backend.classify(img, original_size)
         except Exception as e:
             print(f"Recognition error: {e}")
             return None, 0.0
@@ -142,38 +177,32 @@ class AnimalRecognizer:
         Detect basic features in animal images
         Returns dictionary with detected features
         """
-        features = {
+        try:
+            img, original_size = self.load_image(image_path)
+        except Exception as e:
+            print(f"Feature detection error: {e}")
+            return self._empty_features()
+        return self._detect_features(img, original_size)
+    
+    def _empty_features(self):
+        return {
             'has_face': False,
             'has_body': False,
             'color_dominant': None,
             'size_estimate': None
         }
+    
+    def _detect_features(self, img, original_size):
+        """Detect features on an already decoded RGB image"""
+        features = self._empty_features()
         
         try:
-            # Use OpenCV if available for advanced processing
-            if OPENCV_AVAILABLE and cv2:
-                img = cv2.imread(image_path)
-                if img is not None:
-                    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-                    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-                    hist = cv2.calcHist([hsv], [0], None, [180], [0, 180])
-                    if NUMPY_AVAILABLE and np:
-                        dominant_hue = np.argmax(hist)
-                    else:
-                        dominant_hue = max(range(len(hist)), key=lambda i: hist[i])
-                    height, width = img.shape[:2]
-                    features['size_estimate'] = 'large' if height * width > 500000 else 'small'
-                    return features
-            
-            # Fallback: Basic PIL-based feature detection (lightweight)
-            img = Image.open(image_path)
-            img = img.convert('RGB')
-            width, height = img.size
-            
+            width, height = original_size
             # Size estimation
             features['size_estimate'] = 'large' if width * height > 500000 else 'small'
             
-            # Basic color analysis using PIL
+            # Basic color analysis using PIL (on the reduced decode, which
+            # gives the same mean colour as the full image)
             stat = ImageStat.Stat(img)
             # Get dominant color from mean RGB
             mean_r, mean_g, mean_b = stat.mean
@@ -193,7 +222,44 @@ class AnimalRecognizer:
             return features
 
 
-# Global instance
-recognizer = AnimalRecognizer()
+_recognizer = None
+_recognizer_lock = threading.Lock()
+
+
+def get_recognizer():
+    """Process-wide recognizer, built on first use"""
+    global _recognizer
+    if _recognizer is None:
+        with _recognizer_lock:
+            if _recognizer is None:
+                _recognizer = AnimalRecognizer()
+    return _recognizer
+
+
+def warm_up():
+    """
+    Build the recognizer and import its backends now instead of on the first photo
+    Called after fork by gunicorn (gunicorn.conf.py) and by the job worker
+    """
+    recognizer = get_recognizer()
+    img = Image.new('RGB', (64, 64))
+    recognizer._classify(img, img.size)
+    return recognizer
+
+
+_AVAILABILITY_FLAGS = {
+    'NUMPY_AVAILABLE': 'numpy',
+    'OPENCV_AVAILABLE': 'opencv',
+    'TENSORFLOW_AVAILABLE': 'tensorflow',
+}
+
+
+def __getattr__(name):
+    # Old module-level names, resolved lazily
+    if name == 'recognizer':
+        return get_recognizer()
+    if name in _AVAILABILITY_FLAGS:
+        return backend_available(_AVAILABILITY_FLAGS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
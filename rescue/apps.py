@@ -5,4 +5,7 @@ class RescueConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rescue'
 
-
+    def ready(self):
+        # Register signal handlers and background job handlers
+        from . import signals  # noqa: F401
+        from . import tasks  # noqa: F401
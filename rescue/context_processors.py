@@ -1,22 +1,16 @@
 """
 Context processors for templates
 """
+from django.contrib.auth.models import AnonymousUser
+
+from .identity import Identity
 
-def notification_count(request):
-    """Add unread notification count to context for shelters"""
-    if request.user.is_authenticated and hasattr(request.user, 'shelter'):
-        try:
-            from .models import Notification
-            unread_count = Notification.objects.filter(
-                shelter=request.user.shelter,
-                is_read=False
-            ).count()
-            return {'unread_notification_count': unread_count}
-        except Exception as e:
-            # If database tables don't exist yet, return 0
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Error in notification_count: {e}")
-            pass
-    return {'unread_notification_count': 0}
 
+def notification_count(request):
+    """Add the request identity and, for shelters, the unread notification count"""
+    # Requests that skipped IdentityMiddleware (e.g. some error pages, RequestFactory) have none
+    identity = getattr(request, 'identity', None) or Identity(getattr(request, 'user', AnonymousUser()))
+    if identity.is_shelter:
+        # Maintained on the shelter row, so no COUNT(*) per page
+        return {'identity': identity, 'unread_notification_count': identity.shelter.unread_notification_count}
+    return {'identity': identity, 'unread_notification_count': 0}
@@ -0,0 +1,113 @@
+"""
+Read replicas for read-heavy pages
+Views marked with @reads_from_replica read rescue models from one of the
+DATABASE_REPLICAS aliases on GET/HEAD requests; everything else, and every
+write, uses 'default'. A request that writes sets a signed cookie, and for
+REPLICA_STICKY_SECONDS afterwards that browser reads from the primary, so
+it sees its own writes despite replication lag. Auth, sessions and the job
+queue always stay on the primary.
+
+With no replicas configured the router returns None and Django uses
+'default' as usual.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+STICKY_COOKIE = 'rescue_primary'
+STICKY_SALT = 'rescue.db_router'
+
+# Apps whose reads may go to a replica
+REPLICA_APPS = {'rescue'}
+
+_state = ContextVar('rescue_db_state', default=None)
+
+
+class _RequestState:
+    def __init__(self):
+        self.use_replica = False
+        self.replica = None
+        self.wrote = False
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def reads_from_replica(view):
+    """Mark a read-only view as safe to serve from a replica"""
+    view.reads_from_replica = True
+    return view
+
+
+def _sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+class ReadReplicaRouter:
+    """Send reads in replica-enabled views to a replica, and note writes for stickiness"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or state.wrote:
+            return None
+        if model._meta.app_label not in REPLICA_APPS or model._meta.model_name == 'job':
+            return None
+        if state.replica is None:
+            # One replica per request, so its reads are mutually consistent
+            state.replica = random.choice(replica_aliases())
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication (or sync_sqlite_replica)
+        if db in replica_aliases():
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Per-request routing state; must come before SessionMiddleware so session writes count"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _RequestState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and _sticky_seconds() > 0:
+            response.set_signed_cookie(
+                STICKY_COOKIE, '1', salt=STICKY_SALT, max_age=_sticky_seconds(),
+                httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ('GET', 'HEAD')
+            and getattr(view_func, 'reads_from_replica', False)
+            and replica_aliases()
+            and not self._sticky(request)
+        ):
+            _state.get().use_replica = True
+        return None
+
+    def _sticky(self, request):
+        value = request.get_signed_cookie(
+            STICKY_COOKIE, default=None, salt=STICKY_SALT, max_age=_sticky_seconds()
+        )
+        return value is not None
@@ -1,6 +1,8 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from django.core.files.uploadedfile import UploadedFile
+from .ingestion import ingest_photo
 from .models import Animal, Report, AdoptionRequest, Shelter, Update
 
 
@@ -100,7 +102,22 @@ class UserRegistrationForm(UserCreationForm):
         return cleaned_data
 
 
-class AnimalForm(forms.ModelForm):
+class PhotoIngestionMixin:
+    """Downscale, re-encode and strip metadata from newly uploaded photos (rescue/ingestion.py)"""
+    # (latitude, longitude) from the upload's EXIF, when present and plausible
+    photo_gps = None
+
+    def clean_photo(self):
+        photo = self.cleaned_data.get('photo')
+        # On edit without a new upload this is the stored FieldFile; leave it alone
+        if isinstance(photo, UploadedFile):
+            ingested = ingest_photo(photo)
+            self.photo_gps = ingested.gps
+            photo = ingested.file
+        return photo
+
+
+class AnimalForm(PhotoIngestionMixin, forms.ModelForm):
     class Meta:
         model = Animal
         fields = ['name', 'animal_type', 'breed', 'age', 'gender', 'color', 'size', 'description', 'photo', 'status']
@@ -118,7 +135,7 @@ class AnimalForm(forms.ModelForm):
         }
 
 
-class ReportForm(forms.ModelForm):
+class ReportForm(PhotoIngestionMixin, forms.ModelForm):
     class Meta:
         model = Report
         fields = ['report_type', 'animal_type', 'description', 'location', 'city', 'state', 'zip_code', 'photo']
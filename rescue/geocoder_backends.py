@@ -0,0 +1,245 @@
+"""
+Pluggable geocoder backends
+The backend named by settings.GEOCODER_BACKEND is built once per process and
+wrapped with a rate limiter shared by every process through the database
+(Nominatim allows 1 request/second) and a per-process circuit breaker that
+fails fast after repeated provider failures, so a slow provider cannot tie
+up every worker for the full timeout.
+"""
+import csv
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from geopy.exc import GeocoderServiceError
+
+
+class GeocodingUnavailable(GeocoderServiceError):
+    """Raised without calling the provider (circuit open or rate limit wait too long)"""
+
+
+class SharedRateLimiter:
+    """
+    `rate` calls per second across every process sharing the database
+    Each caller reserves the next free slot in a RateLimit row with a
+    compare-and-set UPDATE, then sleeps until its slot comes up, so web
+    workers, job workers and backfill threads together stay under the
+    provider's limit. Call it outside long transactions: on PostgreSQL
+    the UPDATE holds the row lock until the caller commits.
+    """
+
+    def __init__(self, name, rate):
+        self.name = name
+        self.interval = 1.0 / float(rate)
+
+    def acquire(self, timeout=None):
+        """
+        Reserve one call slot, waiting up to `timeout` seconds (forever if None)
+        Returns False, without reserving, if the next slot is too far away
+        """
+        from .models import RateLimit
+
+        limits = RateLimit.objects.using('default')
+        limits.get_or_create(name=self.name)
+        while True:
+            now = time.time()
+            next_slot = limits.filter(name=self.name).values_list('next_slot', flat=True).get()
+            slot = max(now, next_slot)
+            if timeout is not None and slot - now > timeout:
+                return False
+            # Loses to a concurrent reservation and retries with its new slot
+            if limits.filter(name=self.name, next_slot=next_slot).update(next_slot=slot + self.interval):
+                if slot > now:
+                    time.sleep(slot - now)
+                return True
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through (half-open)
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half_open'
+            return 'open'
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def release(self):
+        """Give up a trial call that was allowed but never made"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class BaseGeocoder:
+    """
+    Backend interface: geocode(address) returns (latitude, longitude) or None
+    and raises geopy's GeocoderServiceError subclasses on provider errors
+    """
+    # Whether calls should go through the shared rate limiter
+    rate_limited = False
+
+    def geocode(self, address):
+        raise NotImplementedError
+
+
+class NominatimGeocoder(BaseGeocoder):
+    """OpenStreetMap Nominatim, with one client shared by the whole process"""
+    rate_limited = True
+
+    def __init__(self, user_agent='animal_rescue', timeout=10, domain=None):
+        from geopy.geocoders import Nominatim
+
+        options = {'user_agent': user_agent, 'timeout': timeout}
+        if domain:
+            options['domain'] = domain
+        self.client = Nominatim(**options)
+
+    def geocode(self, address):
+        location = self.client.geocode(address)
+        if location:
+            return location.latitude, location.longitude
+        return None
+
+
+class OfflineGazetteerGeocoder(BaseGeocoder):
+    """
+    Deterministic geocoder backed by a local CSV gazetteer (address,latitude,longitude)
+    For tests and air-gapped deployments. An address matches the longest
+    trailing run of its comma-separated parts found in the gazetteer, with
+    and without numeric tokens such as postcodes, so
+    "12 MI Road, Jaipur, Rajasthan 302001" falls back to "Jaipur, Rajasthan"
+    """
+
+    def __init__(self, path=None):
+        from .geocoding import normalize_address
+
+        self._normalize = normalize_address
+        self.path = path or getattr(settings, 'GEOCODER_GAZETTEER_PATH')
+        self.places = {}
+        with open(self.path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                key = normalize_address(row['address'])
+                if key:
+                    self.places[key] = (float(row['latitude']), float(row['longitude']))
+
+    def _candidates(self, address):
+        parts = [part for part in (address or '').split(',') if part.strip()]
+        for start in range(len(parts)):
+            key = self._normalize(', '.join(parts[start:]))
+            yield key
+            yield ' '.join(token for token in key.split() if not token.isdigit())
+
+    def geocode(self, address):
+        for key in self._candidates(address):
+            if key in self.places:
+                return self.places[key]
+        return None
+
+
+class GuardedGeocoder:
+    """Applies the rate limiter and circuit breaker around a backend"""
+
+    def __init__(self, backend, limiter=None, breaker=None, max_wait=5):
+        self.backend = backend
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_wait = max_wait
+
+    def geocode(self, address):
+        if self.breaker and not self.breaker.allow():
+            raise GeocodingUnavailable('Geocoder circuit is open after repeated failures')
+        if self.limiter and not self.limiter.acquire(timeout=self.max_wait):
+            if self.breaker:
+                # Nothing was sent, so hand back a half-open trial slot
+                self.breaker.release()
+            raise GeocodingUnavailable('Geocoder rate limit wait exceeded')
+
+        try:
+            result = self.backend.geocode(address)
+        except Exception:
+            # Any error counts, or a failed half-open trial would hold its slot forever
+            if self.breaker:
+                self.breaker.record_failure()
+            raise
+        if self.breaker:
+            self.breaker.record_success()
+        return result
+
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def build_geocoder():
+    backend_class = import_string(getattr(
+        settings, 'GEOCODER_BACKEND', 'rescue.geocoder_backends.NominatimGeocoder'
+    ))
+    options = dict(getattr(settings, 'GEOCODER_OPTIONS', {}))
+    backend = backend_class(**options)
+
+    limiter = None
+    if backend.rate_limited:
+        rate = getattr(settings, 'GEOCODER_RATE_LIMIT', 1.0)
+        limiter = SharedRateLimiter(f'geocoder:{backend_class.__name__}', rate)
+    breaker = CircuitBreaker(
+        failure_threshold=getattr(settings, 'GEOCODER_FAILURE_THRESHOLD', 3),
+        reset_timeout=getattr(settings, 'GEOCODER_RESET_TIMEOUT', 60),
+    )
+    return GuardedGeocoder(
+        backend,
+        limiter=limiter,
+        breaker=breaker,
+        max_wait=getattr(settings, 'GEOCODER_MAX_WAIT', 5),
+    )
+
+
+def get_geocoder():
+    """Process-wide guarded geocoder, built on first use"""
+    global _geocoder
+    if _geocoder is None:
+        with _geocoder_lock:
+            if _geocoder is None:
+                _geocoder = build_geocoder()
+    return _geocoder
+
+
+def reset_geocoder():
+    global _geocoder
+    with _geocoder_lock:
+        _geocoder = None
@@ -0,0 +1,156 @@
+"""
+Geocoding service shared by every address lookup
+Addresses are normalized into a cache key and resolved through an in-process
+LRU, then the persistent GeocodeCache table, and only then the configured
+geocoder backend (see rescue/geocoder_backends.py). Addresses that do not resolve are cached too (negative caching)
+with a shorter TTL. Provider errors are never cached so callers can retry.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from .cache_utils import LRUCache
+from .geocoder_backends import GeocodingUnavailable, get_geocoder
+from .models import GeocodeCache
+
+logger = logging.getLogger(__name__)
+
+# Cached "not found" marker, distinct from an LRU miss (None)
+NOT_FOUND = 'not_found'
+
+_lru = LRUCache(maxsize=getattr(settings, 'GEOCODE_LRU_SIZE', 1024))
+
+_stats_lock = threading.Lock()
+_stats = {
+    'lookups': 0,
+    'lru_hits': 0,
+    'db_hits': 0,
+    'negative_hits': 0,
+    'upstream_calls': 0,
+    'upstream_errors': 0,
+    'upstream_rejected': 0,
+    'upstream_seconds': 0.0,
+}
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def get_stats():
+    """Counters for this process, with the share of lookups served from cache"""
+    with _stats_lock:
+        stats = dict(_stats)
+    cached = stats['lru_hits'] + stats['db_hits']
+    stats['hit_rate'] = cached / stats['lookups'] if stats['lookups'] else 0.0
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0.0 if name == 'upstream_seconds' else 0
+
+
+def clear_memory_cache():
+    _lru.clear()
+
+
+def normalize_address(address):
+    """
+    Canonical form of an address for cache keys
+    Case, punctuation and repeated whitespace are ignored, so
+    "12 Main St., Jaipur" and "12 main st jaipur" share one entry
+    """
+    text = unicodedata.normalize('NFKC', address or '').lower()
+    text = re.sub(r'[^\w]+', ' ', text)
+    return ' '.join(text.split())
+
+
+def cache_key(normalized):
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def _ttl(found):
+    if found:
+        return getattr(settings, 'GEOCODE_CACHE_TTL', 30 * 24 * 3600)
+    return getattr(settings, 'GEOCODE_NEGATIVE_TTL', 24 * 3600)
+
+
+def _lookup_upstream(address):
+    return get_geocoder().geocode(address)
+
+
+def geocode(address):
+    """
+    Return (latitude, longitude) for an address, or None if it does not resolve
+    Geocoder timeouts and service errors propagate to the caller
+    """
+    normalized = normalize_address(address)
+    if not normalized:
+        return None
+    key = cache_key(normalized)
+    _count('lookups')
+
+    cached = _lru.get(key)
+    if cached is not None:
+        _count('lru_hits')
+        if cached == NOT_FOUND:
+            _count('negative_hits')
+            return None
+        return cached
+
+    entry = GeocodeCache.objects.filter(key=key, expires_at__gt=timezone.now()).first()
+    if entry is not None:
+        _count('db_hits')
+        remaining = (entry.expires_at - timezone.now()).total_seconds()
+        if not entry.found:
+            _count('negative_hits')
+            _lru.set(key, NOT_FOUND, ttl=remaining)
+            return None
+        coordinates = (float(entry.latitude), float(entry.longitude))
+        _lru.set(key, coordinates, ttl=remaining)
+        return coordinates
+
+    _count('upstream_calls')
+    start = time.monotonic()
+    try:
+        coordinates = _lookup_upstream(address)
+    except GeocodingUnavailable as e:
+        _count('upstream_rejected')
+        logger.info(f"Geocoding skipped for '{normalized}': {e}")
+        raise
+    except Exception as e:
+        _count('upstream_errors')
+        logger.warning(f"Geocoding failed for '{normalized}': {e}")
+        raise
+    finally:
+        _count('upstream_seconds', time.monotonic() - start)
+
+    found = coordinates is not None
+    ttl = _ttl(found)
+    try:
+        GeocodeCache.objects.update_or_create(
+            key=key,
+            defaults={
+                'query': normalized,
+                'latitude': coordinates[0] if found else None,
+                'longitude': coordinates[1] if found else None,
+                'found': found,
+                'expires_at': timezone.now() + timedelta(seconds=ttl),
+            }
+        )
+    except DatabaseError as e:
+        # The cache is best-effort; a concurrent writer (e.g. SQLite's
+        # single write lock) must not turn a good lookup into a failure
+        logger.warning(f"Could not cache geocode for '{normalized}': {e}")
+    _lru.set(key, coordinates if found else NOT_FOUND, ttl=ttl)
+    return coordinates
@@ -0,0 +1,101 @@
+"""
+Who is making the request, resolved once
+ShelterAwareBackend keeps the session's user, and the id of their Shelter
+(if any), in the cache for USER_CACHE_TTL seconds, so most requests make
+no user query. The Shelter row itself is mutable state written by other
+processes (the worker bumps its unread counter and geocodes it), so it is
+never cached: shelter accounts read it fresh from the primary with one
+query, everyone else makes none. Saving or deleting a user or shelter
+drops the entry (rescue/signals.py); bulk queryset updates do not, and are
+bounded by the TTL. The IdentityMiddleware wraps the user in a lazy,
+per-request Identity that views, context processors and templates share
+instead of probing hasattr(request.user, 'shelter') themselves.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+
+from .models import Shelter
+
+# Dotted path for login() calls that skip authenticate()
+BACKEND = 'rescue.identity.ShelterAwareBackend'
+
+
+def user_cache_key(user_id):
+    return f'rescue:user:{user_id}'
+
+
+def forget_users(user_ids):
+    """Drop cached users once the current transaction commits"""
+    keys = [user_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        # After commit, so no request can re-cache the old row in between
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class ShelterAwareBackend(ModelBackend):
+    """ModelBackend whose session lookup also attaches the user's shelter"""
+
+    def get_user(self, user_id):
+        ttl = getattr(settings, 'USER_CACHE_TTL', 300)
+        key = user_cache_key(user_id)
+        cached = cache.get(key) if ttl else None
+        UserModel = get_user_model()
+        shelter_rel = UserModel._meta.get_field('shelter')
+        if cached is not None:
+            user, shelter_id = cached
+            # From the primary even in @reads_from_replica views: the counter
+            # must not lag behind writes this user just made
+            shelter = Shelter.objects.using('default').filter(pk=shelter_id).first() if shelter_id else None
+        else:
+            try:
+                user = UserModel._default_manager.select_related('shelter').get(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            shelter = getattr(user, 'shelter', None)
+            if ttl:
+                # Cache the user without the shelter row, only its id
+                shelter_rel.delete_cached_value(user)
+                cache.set(key, (user, shelter.pk if shelter else None), ttl)
+        # Attach the shelter (or its absence) so user.shelter never queries
+        shelter_rel.set_cached_value(user, shelter)
+        if shelter is not None:
+            Shelter._meta.get_field('user').set_cached_value(shelter, user)
+        return user if self.user_can_authenticate(user) else None
+
+
+class Identity:
+    """The request's user and, for shelter accounts, their Shelter"""
+
+    def __init__(self, user):
+        self.user = user
+        self.is_authenticated = user.is_authenticated
+        # A missing reverse one-to-one raises an AttributeError subclass;
+        # the backend caches its absence, so this never queries
+        self.shelter = getattr(user, 'shelter', None) if self.is_authenticated else None
+
+    @property
+    def is_shelter(self):
+        return self.shelter is not None
+
+    def manages(self, shelter_id):
+        """Whether this is the shelter with the given id"""
+        return self.shelter is not None and self.shelter.pk == shelter_id
+
+    def __repr__(self):
+        role = f'shelter {self.shelter.pk}' if self.is_shelter else 'user' if self.is_authenticated else 'anonymous'
+        return f'<Identity {role}>'
+
+
+class IdentityMiddleware:
+    """Set request.identity; must come after AuthenticationMiddleware"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.identity = SimpleLazyObject(lambda: Identity(request.user))
+        return self.get_response(request)
@@ -0,0 +1,159 @@
+"""
+Photo ingestion for uploads
+Uploaded photos are normalized before they are stored: capped at
+PHOTO_MAX_DIMENSION pixels on the long side, rotated per their EXIF
+orientation, stripped of metadata (EXIF, GPS, XMP; only the colour profile
+is kept) and re-encoded as JPEG at PHOTO_JPEG_QUALITY. GPS coordinates are
+read from the EXIF first, so a geotagged report can skip address geocoding.
+
+Memory stays bounded whatever the upload size: Django spools large uploads
+to a temporary file, Pillow reads only the header before the size checks,
+and JPEGs are decoded in draft mode, where the decoder itself scales down
+by 1/2, 1/4 or 1/8 instead of materialising every pixel. Images whose
+header claims more pixels than allowed (decompression bombs) are rejected
+before any pixel data is decoded.
+"""
+import math
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import ExifTags, Image, ImageOps
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class IngestedPhoto:
+    """Result of ingest_photo: the file to store plus what was learned from the upload"""
+
+    def __init__(self, file, original_size, size, gps=None):
+        self.file = file
+        self.original_size = original_size
+        self.size = size
+        # (latitude, longitude) as Decimals, or None
+        self.gps = gps
+
+
+def _degrees(value, ref):
+    """EXIF (degrees, minutes, seconds) rationals and an N/S/E/W ref as signed degrees"""
+    degrees, minutes, seconds = (float(part) for part in value)
+    result = degrees + minutes / 60 + seconds / 3600
+    return -result if ref in ('S', 'W') else result
+
+
+def _capture_date(exif, gps_ifd):
+    """Date the photo was taken (GPS date stamp, else camera clock), or None"""
+    stamp = gps_ifd.get(ExifTags.GPS.GPSDateStamp)
+    if stamp:
+        try:
+            return datetime.strptime(stamp.strip(), '%Y:%m:%d').date()
+        except ValueError:
+            pass
+    original = exif.get_ifd(ExifTags.IFD.Exif).get(ExifTags.Base.DateTimeOriginal)
+    if original:
+        try:
+            return datetime.strptime(original.strip()[:10], '%Y:%m:%d').date()
+        except ValueError:
+            pass
+    return None
+
+
+def read_gps(img):
+    """
+    (latitude, longitude) from a photo's EXIF, or None when missing or implausible
+    Old photos are ignored: a picture of a lost pet taken months ago at home
+    says nothing about where the report is. So are (0, 0), out-of-range
+    values and fixes less accurate than PHOTO_GPS_MAX_ERROR_METERS.
+    """
+    try:
+        exif = img.getexif()
+        gps_ifd = exif.get_ifd(ExifTags.IFD.GPSInfo)
+        if not gps_ifd:
+            return None
+        latitude = _degrees(gps_ifd[ExifTags.GPS.GPSLatitude], gps_ifd.get(ExifTags.GPS.GPSLatitudeRef))
+        longitude = _degrees(gps_ifd[ExifTags.GPS.GPSLongitude], gps_ifd.get(ExifTags.GPS.GPSLongitudeRef))
+        error = gps_ifd.get(ExifTags.GPS.GPSHPositioningError)
+        error = float(error) if error is not None else None
+        taken = _capture_date(exif, gps_ifd)
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        return None
+
+    if not (math.isfinite(latitude) and math.isfinite(longitude)):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or (latitude == 0 and longitude == 0):
+        return None
+    if error is not None and error > _setting('PHOTO_GPS_MAX_ERROR_METERS', 500):
+        return None
+    max_age = _setting('PHOTO_GPS_MAX_AGE_DAYS', 3)
+    if taken is not None and max_age and abs((date.today() - taken).days) > max_age:
+        return None
+    return Decimal(f"{latitude:.6f}"), Decimal(f"{longitude:.6f}")
+
+
+def _flatten(img):
+    """RGB copy of img, with any transparency composited onto white"""
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel('A'))
+        return background
+    return img.convert('RGB')
+
+
+def ingest_photo(upload):
+    """
+    Validate and normalize an uploaded image; returns an IngestedPhoto
+    Raises ValidationError for oversized, oversized-when-decoded or unreadable files
+    """
+    max_bytes = _setting('PHOTO_MAX_UPLOAD_BYTES', 15 * 1024 * 1024)
+    if upload.size and upload.size > max_bytes:
+        raise ValidationError(f"Photo is too large (max {max_bytes // (1024 * 1024)} MB).")
+
+    max_dimension = _setting('PHOTO_MAX_DIMENSION', 2048)
+    upload.seek(0)
+    try:
+        img = Image.open(upload)
+        original_size = img.size
+        pixels = img.width * img.height
+        # Draft mode keeps JPEG decoding small; other formats decode in full
+        if img.format == 'JPEG':
+            limit = _setting('PHOTO_MAX_PIXELS', 50_000_000)
+        else:
+            limit = _setting('PHOTO_MAX_FULL_DECODE_PIXELS', 16_000_000)
+        if pixels > limit:
+            raise ValidationError('Photo dimensions are too large.')
+
+        gps = read_gps(img)
+        icc_profile = img.info.get('icc_profile')
+        if img.format == 'JPEG':
+            img.draft('RGB', (max_dimension, max_dimension))
+        # Orientation lives in EXIF, which is about to be dropped
+        img = ImageOps.exif_transpose(img)
+        img = _flatten(img)
+        img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+        output = BytesIO()
+        options = {'quality': _setting('PHOTO_JPEG_QUALITY', 85), 'optimize': True}
+        if icc_profile:
+            options['icc_profile'] = icc_profile
+        img.save(output, 'JPEG', **options)
+    except ValidationError:
+        raise
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+        raise ValidationError('Photo dimensions are too large.')
+    except Exception:
+        raise ValidationError('Upload a valid image.')
+
+    stem = os.path.splitext(os.path.basename(upload.name or 'photo'))[0] or 'photo'
+    return IngestedPhoto(
+        file=ContentFile(output.getvalue(), name=f"{stem}.jpg"),
+        original_size=original_size,
+        size=img.size,
+        gps=gps,
+    )
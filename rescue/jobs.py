@@ -0,0 +1,215 @@
+"""
+Lightweight database-backed job queue
+Slow side effects (geocoding, image recognition, notification fan-out) are
+stored as Job rows and executed by `python manage.py rescue_worker`, so web
+requests never wait on them. No external broker is needed.
+
+Execution is at-least-once: a job whose worker dies is re-claimed after
+RESCUE_JOBS_VISIBILITY_TIMEOUT seconds, so handlers must be idempotent.
+Failed jobs are retried with exponential backoff up to max_attempts.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class JobSpec:
+    def __init__(self, name, func, max_attempts, on_failure):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+        self.on_failure = on_failure
+
+
+def job(name, max_attempts=5, on_failure=None):
+    """
+    Register a function as a job handler
+    on_failure(**payload) runs once the job has exhausted its attempts
+    """
+    def decorator(func):
+        _registry[name] = JobSpec(name, func, max_attempts, on_failure)
+        return func
+    return decorator
+
+
+def get_job_spec(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError(f"Unknown job: {name}")
+
+
+def enqueue(name, delay=0, **payload):
+    """
+    Queue a job for the background worker
+    With RESCUE_JOBS_EAGER=True the job runs immediately in-process instead
+    (useful for development without a worker running)
+    """
+    spec = get_job_spec(name)
+    if getattr(settings, 'RESCUE_JOBS_EAGER', False):
+        _run_eager(spec, payload)
+        return None
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=spec.max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def _run_eager(spec, payload):
+    try:
+        spec.func(**payload)
+    except Exception as e:
+        logger.warning(f"Eager job {spec.name} failed: {e}")
+        if spec.on_failure:
+            spec.on_failure(**payload)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _stale_before(now):
+    return now - timedelta(seconds=getattr(settings, 'RESCUE_JOBS_VISIBILITY_TIMEOUT', 300))
+
+
+def _claimable(now):
+    return (
+        Q(status='pending', run_after__lte=now) |
+        Q(status='running', locked_at__lt=_stale_before(now), attempts__lt=F('max_attempts'))
+    )
+
+
+def fail_abandoned_jobs(now=None):
+    """
+    Fail jobs whose worker died on their last attempt (e.g. killed while
+    decoding a huge photo) instead of re-claiming them forever
+    Returns the number of jobs failed.
+    """
+    now = now or timezone.now()
+    abandoned = (
+        Job.objects.filter(status='running', locked_at__lt=_stale_before(now), attempts__gte=F('max_attempts'))
+        .values_list('pk', 'name', 'payload', 'locked_at', 'attempts')
+    )
+    failed = 0
+    for pk, name, payload, locked_at, attempts in abandoned:
+        # Compare-and-set, so only one worker fails the job and runs on_failure
+        if not Job.objects.filter(pk=pk, status='running', locked_at=locked_at).update(
+            status='failed',
+            locked_at=None,
+            last_error=f"Worker stopped responding during attempt {attempts}",
+            updated_at=now,
+        ):
+            continue
+        failed += 1
+        logger.error(f"Job {name} #{pk} failed permanently: worker stopped responding")
+        spec = _registry.get(name)
+        if spec and spec.on_failure:
+            spec.on_failure(**payload)
+    return failed
+
+
+def claim_jobs(worker_id, limit=10):
+    """
+    Lock up to `limit` due jobs for this worker and return them
+    Uses SELECT ... FOR UPDATE SKIP LOCKED where the database supports it
+    (PostgreSQL, MySQL 8) so workers never block on each other's rows
+    """
+    now = timezone.now()
+    fail_abandoned_jobs(now)
+    claim = {
+        'status': 'running',
+        'locked_by': worker_id,
+        'locked_at': now,
+        'attempts': F('attempts') + 1,
+        'updated_at': now,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(_claimable(now))
+                .order_by('run_after')
+                .values_list('pk', flat=True)[:limit]
+            )
+            if ids:
+                Job.objects.filter(pk__in=ids).update(**claim)
+    else:
+        # SQLite has no row locks, but it serializes writers, so a
+        # compare-and-set UPDATE per candidate claims each job exactly once
+        ids = []
+        candidates = (
+            Job.objects.filter(_claimable(now))
+            .order_by('run_after')
+            .values_list('pk', 'status', 'locked_at')[:limit]
+        )
+        for pk, status, locked_at in candidates:
+            if Job.objects.filter(pk=pk, status=status, locked_at=locked_at).update(**claim):
+                ids.append(pk)
+
+    return list(Job.objects.filter(pk__in=ids, locked_by=worker_id).order_by('run_after'))
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, capped at RESCUE_JOBS_RETRY_MAX_SECONDS"""
+    base = getattr(settings, 'RESCUE_JOBS_RETRY_BASE_SECONDS', 30)
+    cap = getattr(settings, 'RESCUE_JOBS_RETRY_MAX_SECONDS', 3600)
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run_job(job_obj):
+    """Execute a claimed job and record success, retry or failure"""
+    owned = Job.objects.filter(pk=job_obj.pk, locked_by=job_obj.locked_by)
+    try:
+        spec = get_job_spec(job_obj.name)
+        spec.func(**job_obj.payload)
+    except Exception as e:
+        now = timezone.now()
+        error = ''.join(traceback.format_exception(type(e), e, e.__traceback__))
+        if job_obj.attempts >= job_obj.max_attempts:
+            logger.error(f"Job {job_obj} failed permanently: {e}")
+            owned.update(status='failed', locked_at=None, last_error=error, updated_at=now)
+            spec = _registry.get(job_obj.name)
+            if spec and spec.on_failure:
+                spec.on_failure(**job_obj.payload)
+        else:
+            delay = retry_delay(job_obj.attempts)
+            logger.warning(f"Job {job_obj} failed (attempt {job_obj.attempts}), retrying in {delay:.0f}s: {e}")
+            owned.update(
+                status='pending',
+                locked_at=None,
+                locked_by='',
+                last_error=error,
+                run_after=now + timedelta(seconds=delay),
+                updated_at=now,
+            )
+        return False
+
+    # Finished jobs are deleted to keep the claim query on a small table
+    owned.delete()
+    return True
+
+
+def run_pending(worker_id=None, limit=10):
+    """Claim and run one batch of jobs; returns the number of jobs claimed"""
+    jobs = claim_jobs(worker_id or default_worker_id(), limit=limit)
+    for job_obj in jobs:
+        run_job(job_obj)
+    return len(jobs)
@@ -0,0 +1,148 @@
+"""
+Geocode shelters and reports that are missing coordinates
+
+Rows are streamed in primary-key order and geocoded through a bounded
+thread pool. Every call goes through the shared geocoding service, so the
+cache and the rate limiter shared with the web and job workers apply. Results are written back with
+bulk_update one batch at a time, and the last finished primary key is saved
+to a checkpoint file, so an interrupted run resumes where it stopped.
+bulk_update sends no post_save, so the command does what the geocoding jobs
+would: it patches the shelter index and queues the notify/match jobs for
+every report it locates.
+
+Usage: python manage.py backfill_geocodes [--model shelter|report|all] [--workers 4]
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from rescue import geocoding, spatial_index
+from rescue.jobs import enqueue
+from rescue.models import Report, Shelter
+
+
+MODELS = {
+    'shelter': (Shelter, ['address', 'city', 'state', 'zip_code']),
+    'report': (Report, ['location', 'city', 'state', 'zip_code']),
+}
+
+
+def _geocode_row(query):
+    """Runs in a pool thread; returns ('located', coords), ('not_found', None) or ('error', message)"""
+    try:
+        coordinates = geocoding.geocode(query)
+    except Exception as e:
+        # Any failure (not only provider errors) skips just this row
+        return 'error', str(e)
+    finally:
+        # Pool threads each open their own connection for the cache and rate-limit tables
+        connection.close()
+    if coordinates:
+        return 'located', coordinates
+    return 'not_found', None
+
+
+class Command(BaseCommand):
+    help = 'Geocode shelters and reports whose latitude/longitude are missing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=['shelter', 'report', 'all'], default='all')
+        parser.add_argument('--workers', type=int, default=4, help='Geocoding threads')
+        parser.add_argument('--batch-size', type=int, default=100, help='Rows per bulk_update')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many rows per model')
+        parser.add_argument(
+            '--checkpoint',
+            default=str(Path(settings.BASE_DIR) / '.backfill_geocodes.json'),
+            help='File recording progress so an interrupted run can resume',
+        )
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+
+    def handle(self, *args, **options):
+        checkpoint_path = Path(options['checkpoint'])
+        checkpoint = {}
+        if checkpoint_path.exists() and not options['restart']:
+            checkpoint = json.loads(checkpoint_path.read_text())
+
+        names = list(MODELS) if options['model'] == 'all' else [options['model']]
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for name in names:
+                self._backfill(name, pool, checkpoint, checkpoint_path, options)
+
+        stats = geocoding.get_stats()
+        self.stdout.write(
+            f"Geocoding: {stats['lookups']} lookup(s), {stats['hit_rate']:.0%} from cache, "
+            f"{stats['upstream_calls']} external call(s), {stats['upstream_errors']} error(s)"
+        )
+
+    def _backfill(self, name, pool, checkpoint, checkpoint_path, options):
+        model, address_fields = MODELS[name]
+        last_pk = checkpoint.get(name, 0)
+        pending = model.objects.filter(Q(latitude__isnull=True) | Q(longitude__isnull=True))
+        remaining = pending.filter(pk__gt=last_pk).count()
+        if options['limit'] is not None:
+            remaining = min(remaining, options['limit'])
+        self.stdout.write(f"{name}: {remaining} row(s) to geocode (resuming after pk {last_pk})")
+
+        totals = {'located': 0, 'not_found': 0, 'error': 0}
+        processed = 0
+        start = time.monotonic()
+
+        while processed < remaining:
+            size = min(options['batch_size'], remaining - processed)
+            rows = list(
+                pending.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .only('pk', 'latitude', 'longitude', 'location_status', *address_fields)[:size]
+            )
+            if not rows:
+                break
+
+            results = pool.map(_geocode_row, [row.geocode_query for row in rows])
+            changed = []
+            for row, (outcome, value) in zip(rows, results):
+                totals[outcome] += 1
+                if outcome == 'located':
+                    row.latitude, row.longitude = value
+                    row.location_status = 'located'
+                    changed.append(row)
+                elif outcome == 'not_found':
+                    row.location_status = 'not_found'
+                    changed.append(row)
+                # Provider errors leave the row untouched for a later run
+
+            if changed:
+                model.objects.bulk_update(changed, ['latitude', 'longitude', 'location_status'])
+                self._after_update(model, changed)
+
+            processed += len(rows)
+            last_pk = rows[-1].pk
+            checkpoint[name] = last_pk
+            checkpoint_path.write_text(json.dumps(checkpoint))
+
+            elapsed = time.monotonic() - start
+            self.stdout.write(
+                f"{name}: {processed}/{remaining} "
+                f"({totals['located']} located, {totals['not_found']} not found, {totals['error']} error(s)) "
+                f"{processed / elapsed if elapsed else 0:.1f} rows/s"
+            )
+
+        if options['limit'] is None:
+            # A full pass is done; rows that errored are retried from the start next time
+            checkpoint.pop(name, None)
+            checkpoint_path.write_text(json.dumps(checkpoint))
+        self.stdout.write(self.style.SUCCESS(f"{name}: done, {totals['located']} row(s) geocoded"))
+
+    def _after_update(self, model, rows):
+        """The follow-up work the post_save signal and geocode_report would have done"""
+        for row in rows:
+            if model is Shelter:
+                spatial_index.update_shelter(row)
+            elif row.location_status == 'located':
+                enqueue('notify_nearby_shelters', report_id=row.pk)
+                enqueue('match_report', report_id=row.pk)
@@ -0,0 +1,77 @@
+"""
+Compute perceptual hashes for report and animal photos that lack one
+
+Photos are decoded in a process pool and written back with bulk_update one
+batch at a time. Reports hashed in this run are then checked for reposts of
+earlier reports, as new uploads are.
+
+Usage: python manage.py backfill_photo_hashes [--workers 4] [--batch-size 200]
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from rescue import photo_index
+from rescue.models import Animal, Report
+
+
+def _hash_or_none(path):
+    """Runs in a pool process; unreadable photos are skipped"""
+    try:
+        return photo_index.photo_hash(path)
+    except Exception:
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Perceptual-hash existing report and animal photos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Decoding processes')
+        parser.add_argument('--batch-size', type=int, default=200, help='Rows per bulk_update')
+
+    def handle(self, *args, **options):
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            hashed_reports = self._backfill(Report, pool, options['batch_size'])
+            self._backfill(Animal, pool, options['batch_size'])
+
+        # The indexes in this process predate the bulk updates
+        photo_index.reset_photo_indexes()
+        originals = {}
+        batch_size = options['batch_size']
+        for start in range(0, len(hashed_reports), batch_size):
+            reports = Report.objects.filter(
+                pk__in=hashed_reports[start:start + batch_size], duplicate_of__isnull=True
+            ).order_by('pk').only('pk', 'report_type', 'photo_hash', 'duplicate_of')
+            flagged = []
+            for report in reports:
+                original_id = photo_index.find_original_report_id(report)
+                if original_id:
+                    # Earlier reports flagged in this run aren't saved yet
+                    report.duplicate_of_id = originals.get(original_id, original_id)
+                    originals[report.pk] = report.duplicate_of_id
+                    flagged.append(report)
+            Report.objects.bulk_update(flagged, ['duplicate_of'])
+        self.stdout.write(self.style.SUCCESS(f"{len(originals)} report(s) flagged as reposts"))
+
+    def _backfill(self, model, pool, batch_size):
+        name = model.__name__.lower()
+        pending = model.objects.exclude(photo='').exclude(photo__isnull=True).filter(photo_hash='')
+        hashed, skipped, last_pk = [], 0, 0
+        while True:
+            rows = list(pending.filter(pk__gt=last_pk).order_by('pk').only('pk', 'photo', 'photo_hash')[:batch_size])
+            if not rows:
+                break
+            last_pk = rows[-1].pk
+            changed = []
+            for row, value in zip(rows, pool.map(_hash_or_none, [row.photo.path for row in rows])):
+                if value is None:
+                    skipped += 1
+                    continue
+                row.photo_hash = value
+                changed.append(row)
+            model.objects.bulk_update(changed, ['photo_hash'])
+            hashed.extend(row.pk for row in changed)
+            self.stdout.write(f"{name}: {len(hashed)} hashed, {skipped} unreadable")
+        return hashed
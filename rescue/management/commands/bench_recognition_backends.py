@@ -0,0 +1,108 @@
+"""
+Microbenchmark the image recognition backends
+
+Each available backend classifies the same decoded images, one at a time
+(latency) and in batches (throughput). Without photos, synthetic noise
+images are used. Without trained weights, the numpy backend is measured with
+random weights; its timing does not depend on the weight values.
+
+Usage: python manage.py bench_recognition_backends [--images photos/] [--count 256] [--batch-size 32]
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rescue.ai_recognition import AnimalRecognizer
+from rescue.recognition_backends import (
+    ANIMAL_CLASSES, NumpyBackend, _registry, extract_features, load_backend, save_numpy_weights,
+)
+from PIL import Image
+
+
+class Command(BaseCommand):
+    help = 'Measure per-image latency and batch throughput of each recognition backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', help='Directory of photos to use instead of synthetic images')
+        parser.add_argument('--count', type=int, default=256, help='Images per run')
+        parser.add_argument('--batch-size', type=int, default=32)
+        parser.add_argument('--backend', action='append', help='Only these backends (repeatable)')
+
+    def handle(self, *args, **options):
+        items = self._load_items(options)
+        if not items:
+            raise CommandError('No images to benchmark')
+        self.stdout.write(f"{len(items)} image(s), batch size {options['batch_size']}")
+
+        names = options['backend'] or list(_registry)
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in names:
+                backend = self._build(name, tmp)
+                if backend is None:
+                    self.stdout.write(f"{name:<12} not available")
+                    continue
+                self._bench(name, backend, items, options['batch_size'])
+
+    def _load_items(self, options):
+        if options['images']:
+            paths = sorted(p for p in Path(options['images']).rglob('*') if p.is_file())[:options['count']]
+            items = []
+            for path in paths:
+                try:
+                    items.append(AnimalRecognizer.load_image(path))
+                except Exception:
+                    continue
+            return items
+
+        np = load_backend('numpy')
+        if np is None:
+            return [(Image.effect_noise((512, 384), 64).convert('RGB'), (2048, 1536))] * options['count']
+        rng = np.random.default_rng(0)
+        return [
+            (Image.fromarray(rng.integers(0, 256, (384, 512, 3), dtype=np.uint8)), (2048, 1536))
+            for _ in range(options['count'])
+        ]
+
+    def _build(self, name, tmp):
+        cls = _registry[name]
+        if cls.is_available():
+            return cls()
+        if cls is NumpyBackend and load_backend('numpy') is not None:
+            np = load_backend('numpy')
+            width = extract_features(np.zeros((1, 8, 8, 3), dtype=np.uint8)).shape[1]
+            rng = np.random.default_rng(0)
+            path = os.path.join(tmp, 'weights.npz')
+            save_numpy_weights(
+                path,
+                rng.normal(size=(width, len(ANIMAL_CLASSES))),
+                np.zeros(len(ANIMAL_CLASSES)),
+                np.zeros(width),
+                np.ones(width),
+                ANIMAL_CLASSES,
+            )
+            self.stdout.write(f"{name:<12} (no weights file; using random weights)")
+            return NumpyBackend(weights_path=path)
+        return None
+
+    def _bench(self, name, backend, items, batch_size):
+        latencies = []
+        for img, original_size in items[:min(len(items), 64)]:
+            start = time.perf_counter()
+            backend.classify(img, original_size)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+        start = time.perf_counter()
+        for offset in range(0, len(items), batch_size):
+            backend.classify_batch(items[offset:offset + batch_size])
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{name:<12} latency p50 {p50:.2f} ms, p95 {p95:.2f} ms; "
+            f"batched {len(items) / elapsed:.0f} images/s"
+        )
@@ -0,0 +1,90 @@
+"""
+Benchmark nearby-shelter lookups on synthetic shelters
+
+Usage: python manage.py bench_spatial_index --sizes 100 10000 100000
+"""
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from rescue.notification_utils import calculate_distance
+from rescue.spatial_index import GridIndex, NUMPY_AVAILABLE
+
+
+# Rough bounding box of India, where most shelters are registered
+LAT_RANGE = (8.0, 35.0)
+LON_RANGE = (68.0, 97.0)
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _timed(func, queries):
+    samples = []
+    for lat, lon in queries:
+        start = time.perf_counter()
+        func(lat, lon)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+class Command(BaseCommand):
+    help = 'Benchmark radius and k-nearest shelter lookups at several index sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 100000])
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--radius', type=float, default=50.0, help='Radius in km')
+        parser.add_argument('--k', type=int, default=10, help='Neighbours for k-nearest queries')
+        parser.add_argument('--cell-size', type=float, default=0.5, help='Grid cell size in degrees')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--skip-baseline', action='store_true',
+                            help='Skip the linear scan baseline (slow at 100k)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        radius = options['radius']
+        k = options['k']
+
+        self.stdout.write(f"NumPy vectorized pass: {'yes' if NUMPY_AVAILABLE else 'no (pure Python fallback)'}")
+        self.stdout.write(f"{'shelters':>9} {'query':>10} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+
+        for size in options['sizes']:
+            points = [(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for _ in range(size)]
+            queries = [(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for _ in range(options['queries'])]
+
+            index = GridIndex(cell_size_deg=options['cell_size'])
+            start = time.perf_counter()
+            for pk, (lat, lon) in enumerate(points):
+                index.insert(pk, lat, lon)
+            build_ms = (time.perf_counter() - start) * 1000
+            # Warm the per-cell array caches the way a long-lived worker would
+            for lat, lon in queries:
+                index.within(lat, lon, radius)
+
+            runs = [
+                ('radius', lambda lat, lon: index.within(lat, lon, radius)),
+                ('knn', lambda lat, lon: index.nearest(lat, lon, k=k)),
+            ]
+            if not options['skip_baseline']:
+                def linear_scan(lat, lon):
+                    hits = []
+                    for plat, plon in points:
+                        distance = calculate_distance(lat, lon, plat, plon)
+                        if distance is not None and distance <= radius:
+                            hits.append(distance)
+                    hits.sort()
+                    return hits
+                runs.append(('linear', linear_scan))
+
+            for name, func in runs:
+                samples = _timed(func, queries)
+                self.stdout.write(
+                    f"{size:>9} {name:>10} {statistics.mean(samples):>9.3f} "
+                    f"{_percentile(samples, 50):>9.3f} {_percentile(samples, 99):>9.3f}"
+                )
+            self.stdout.write(f"{size:>9} {'build':>10} {build_ms:>9.1f}")
@@ -0,0 +1,98 @@
+"""
+Train weights for the numpy recognition backend
+
+Expects one sub-directory of example photos per animal type, e.g.
+photos/dog/*.jpg, photos/cat/*.jpg. Fits a multinomial logistic regression
+on the backend's colour-histogram and edge-density features and writes the
+uncompressed .npz the backend memory-maps. Restart workers to pick it up.
+
+Usage: python manage.py build_numpy_classifier photos/ [--output rescue/data/numpy_classifier.npz]
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from rescue.ai_recognition import AnimalRecognizer
+from rescue.models import Animal
+from rescue.recognition_backends import NumpyBackend, extract_features, load_backend, save_numpy_weights
+
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp'}
+
+
+class Command(BaseCommand):
+    help = 'Fit the numpy image classifier from a directory of labelled example photos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('data_dir', help='Directory with one sub-directory of photos per animal type')
+        parser.add_argument('--output', default=settings.RECOGNITION_NUMPY_WEIGHTS, help='Weights file to write')
+        parser.add_argument('--epochs', type=int, default=500, help='Gradient descent steps')
+        parser.add_argument('--learning-rate', type=float, default=0.5)
+        parser.add_argument('--l2', type=float, default=1e-3, help='Weight decay')
+        parser.add_argument('--batch-size', type=int, default=64, help='Photos per feature extraction batch')
+
+    def handle(self, *args, **options):
+        np = load_backend('numpy')
+        if np is None:
+            raise CommandError('NumPy is not installed')
+
+        data_dir = Path(options['data_dir'])
+        known_types = {value for value, _ in Animal.ANIMAL_TYPES}
+        classes = sorted(path.name for path in data_dir.iterdir() if path.is_dir()) if data_dir.is_dir() else []
+        if not classes:
+            raise CommandError(f"No class sub-directories found in {data_dir}")
+        unknown = set(classes) - known_types
+        if unknown:
+            raise CommandError(f"Unknown animal type(s): {', '.join(sorted(unknown))}; use {', '.join(sorted(known_types))}")
+
+        samples = [
+            (path, label)
+            for label, name in enumerate(classes)
+            for path in sorted((data_dir / name).iterdir())
+            if path.suffix.lower() in IMAGE_SUFFIXES
+        ]
+        features, labels = self._features(samples, options['batch_size'])
+        if len(labels) < len(classes):
+            raise CommandError('Need at least one readable photo per class')
+
+        mean = features.mean(axis=0)
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1.0
+        x = (features - mean) / scale
+        y = np.eye(len(classes), dtype=np.float32)[labels]
+
+        weights = np.zeros((x.shape[1], len(classes)), dtype=np.float32)
+        bias = np.zeros(len(classes), dtype=np.float32)
+        for _ in range(options['epochs']):
+            logits = x @ weights + bias
+            logits -= logits.max(axis=1, keepdims=True)
+            probabilities = np.exp(logits)
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            error = (probabilities - y) / len(x)
+            weights -= options['learning_rate'] * (x.T @ error + options['l2'] * weights)
+            bias -= options['learning_rate'] * error.sum(axis=0)
+
+        accuracy = float(((x @ weights + bias).argmax(axis=1) == labels).mean())
+        save_numpy_weights(options['output'], weights, bias, mean, scale, classes)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {options['output']}: {len(labels)} photo(s), {len(classes)} class(es), "
+            f"training accuracy {accuracy:.1%}"
+        ))
+
+    def _features(self, samples, batch_size):
+        np = load_backend('numpy')
+        rows, labels = [], []
+        for start in range(0, len(samples), batch_size):
+            items = []
+            for path, label in samples[start:start + batch_size]:
+                try:
+                    items.append(AnimalRecognizer.load_image(path, target_size=NumpyBackend.input_size))
+                except Exception as e:
+                    self.stderr.write(f"Skipping {path}: {e}")
+                    continue
+                labels.append(label)
+            if items:
+                rows.append(extract_features(NumpyBackend.to_array(items), [size for _, size in items]))
+        if not rows:
+            return np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.intp)
+        return np.concatenate(rows), np.asarray(labels, dtype=np.intp)
@@ -0,0 +1,81 @@
+"""
+Check that page query counts do not grow with the number of rows
+
+Renders each page with the test client against a small dataset, adds more
+rows that the page lists (animals, reports, requests, notifications,
+updates) and renders it again. A page whose query count rises has an N+1
+lookup; one that exceeds --max-queries is over budget. Either exits non-zero.
+All rows are created inside a transaction that is rolled back. The same
+comparison runs in the test suite (rescue/tests.py).
+
+Usage: python manage.py check_query_budgets [--max-queries 15] [-v 2]
+"""
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from rescue.identity import user_cache_key
+from rescue.query_checks import PAGES, Fixture, render_page
+
+
+class Command(BaseCommand):
+    help = 'Fail if any page issues more queries as its lists grow, or more than --max-queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-queries', type=int, default=15, help='Query budget per page')
+        parser.add_argument('--rows', type=int, default=2, help='Rows per list for the first render')
+        parser.add_argument('--grow', type=int, default=8, help='Rows added per list before the second render')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                failures = self._check(options)
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+        if failures:
+            raise CommandError(f"{len(failures)} page(s) over budget: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('All pages within their query budget'))
+
+    def _check(self, options):
+        fixture = Fixture()
+        try:
+            return self._compare(fixture, options)
+        finally:
+            # The rollback fires no invalidation, and SQLite may reuse these ids
+            cache.delete_many([user_cache_key(pk) for pk in fixture.user_ids])
+
+    def _compare(self, fixture, options):
+        fixture.grow(options['rows'])
+        before = {label: self._count(fixture, page, options) for label, *page in PAGES}
+        fixture.grow(options['grow'])
+
+        failures = []
+        self.stdout.write(f"{'page':<20} {'queries':>8} {'after +' + str(options['grow']):>10}")
+        for label, *page in PAGES:
+            after = self._count(fixture, page, options)
+            problems = []
+            if after > before[label]:
+                problems.append('grows with rows')
+            if after > options['max_queries']:
+                problems.append('over budget')
+            line = f"{label:<20} {before[label]:>8} {after:>10}"
+            if problems:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f"{line}  FAIL: {', '.join(problems)}"))
+            else:
+                self.stdout.write(line)
+        return failures
+
+    def _count(self, fixture, page, options):
+        url, response, queries = render_page(fixture, *page)
+        if response.status_code != 200:
+            raise CommandError(f"{url} returned {response.status_code}")
+        if options['verbosity'] > 1:
+            self.stdout.write(f"-- {url}")
+            for query in queries.captured_queries:
+                self.stdout.write(f"   {query['sql']}")
+        return len(queries)
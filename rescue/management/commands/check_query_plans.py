@@ -0,0 +1,55 @@
+"""
+Check that the hot list queries use their indexes
+
+Seeds a synthetic dataset inside a transaction, runs EXPLAIN on each query
+the list pages issue and fails (non-zero exit) when a plan no longer uses
+the expected index, falls back to a sequential scan or sorts in a temporary
+B-tree. Everything, including the seeded rows and planner statistics, is
+rolled back afterwards. On PostgreSQL sequential scans are disabled for the
+check, so a small table cannot hide a missing index. The same checks run
+in the test suite (rescue/tests.py); this command runs them against a real
+database, e.g. PostgreSQL in staging.
+
+Usage: python manage.py check_query_plans [--rows 5000] [-v 2]
+"""
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from rescue.query_checks import FORBIDDEN, analyze, hot_queries, plan_problems, seed_plan_data
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot list queries on seeded data and fail if any stops using its index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Animals, reports and notifications to seed')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in FORBIDDEN:
+            self.stdout.write(f"No plan expectations for {vendor}; nothing checked")
+            return
+
+        failures = []
+        with transaction.atomic():
+            shelter = seed_plan_data(options['rows'], random.Random(options['seed']))
+            analyze(vendor)
+            for label, queryset, expected in hot_queries(shelter):
+                plan = queryset.explain()
+                used, problems = plan_problems(vendor, label, plan, expected)
+                if problems:
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f"FAIL {label}: {', '.join(problems)}"))
+                    self.stdout.write(plan)
+                else:
+                    self.stdout.write(f"ok   {label} ({', '.join(used) or 'no index expected'})")
+                    if options['verbosity'] > 1:
+                        self.stdout.write(plan)
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"{len(failures)} query plan(s) regressed: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('All query plans use their indexes'))
@@ -0,0 +1,77 @@
+"""
+Generate thumbnail and medium renditions for existing photos
+
+Photos are processed by a thread pool (Pillow releases the GIL while
+decoding and encoding) and flagged ready with bulk_update one batch at a
+time, so an interrupted run simply continues with the photos still pending.
+
+Usage: python manage.py generate_renditions [--model animal|report|all] [--workers 4] [--force]
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from rescue import renditions
+from rescue.models import Animal, Report
+
+MODELS = {
+    'animal': Animal,
+    'report': Report,
+}
+
+
+def _generate(field_file):
+    """Runs in a pool thread; returns (rendition widths, None) or (None, error message)"""
+    try:
+        return renditions.generate_renditions(field_file), None
+    except Exception as e:
+        return None, str(e)
+
+
+class Command(BaseCommand):
+    help = 'Write resized WebP/JPEG renditions for animal and report photos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=['animal', 'report', 'all'], default='all')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--force', action='store_true', help='Regenerate renditions that already exist')
+
+    def handle(self, *args, **options):
+        names = list(MODELS) if options['model'] == 'all' else [options['model']]
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            for name in names:
+                self._backfill(name, pool, options)
+
+    def _backfill(self, name, pool, options):
+        model = MODELS[name]
+        pending = model.objects.exclude(photo='').exclude(photo__isnull=True)
+        if options['force']:
+            pending.update(photo_renditions_ready=False)
+        pending = pending.filter(photo_renditions_ready=False)
+
+        done = failed = 0
+        last_pk = 0
+        while True:
+            rows = list(
+                pending.filter(pk__gt=last_pk).order_by('pk')
+                .only('pk', 'photo', 'photo_renditions_ready')[:options['batch_size']]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1].pk
+
+            ready = []
+            for row, (widths, error) in zip(rows, pool.map(_generate, [row.photo for row in rows])):
+                if error:
+                    failed += 1
+                    self.stderr.write(f"{name} #{row.pk}: {error}")
+                    continue
+                row.photo_renditions_ready = True
+                row.photo_rendition_widths = widths
+                ready.append(row)
+            model.objects.bulk_update(ready, ['photo_renditions_ready', 'photo_rendition_widths'])
+            done += len(ready)
+            self.stdout.write(f"{name}: {done} done, {failed} failed")
+
+        self.stdout.write(self.style.SUCCESS(f"{name}: renditions ready for {done} photo(s)"))
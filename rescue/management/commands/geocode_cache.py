@@ -0,0 +1,31 @@
+"""
+Inspect or prune the persistent geocoding cache
+
+Usage: python manage.py geocode_cache [--purge-expired] [--clear]
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from rescue.models import GeocodeCache
+
+
+class Command(BaseCommand):
+    help = 'Show geocoding cache size and optionally purge expired or all entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--purge-expired', action='store_true', help='Delete expired entries')
+        parser.add_argument('--clear', action='store_true', help='Delete every entry')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted, _ = GeocodeCache.objects.all().delete()
+            self.stdout.write(f"Deleted {deleted} cache entr{'y' if deleted == 1 else 'ies'}")
+        elif options['purge_expired']:
+            deleted, _ = GeocodeCache.objects.filter(expires_at__lte=timezone.now()).delete()
+            self.stdout.write(f"Deleted {deleted} expired cache entr{'y' if deleted == 1 else 'ies'}")
+
+        now = timezone.now()
+        live = GeocodeCache.objects.filter(expires_at__gt=now)
+        self.stdout.write(f"Resolved addresses:   {live.filter(found=True).count()}")
+        self.stdout.write(f"Unresolved addresses: {live.filter(found=False).count()}")
+        self.stdout.write(f"Expired entries:      {GeocodeCache.objects.filter(expires_at__lte=now).count()}")
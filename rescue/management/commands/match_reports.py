@@ -0,0 +1,49 @@
+"""
+Recompute lost/found matching keys and matches for located reports
+
+New reports are matched by the background worker as soon as they are
+located. Run this once after deploying matching, or after changing
+MATCH_CELL_DEGREES / MATCH_TIME_BUCKET_DAYS, to refresh every report.
+
+Usage: python manage.py match_reports [--days 60] [--batch-size 500]
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from rescue import matching
+from rescue.models import Report
+
+
+class Command(BaseCommand):
+    help = 'Refresh geo_cell/time_bucket keys and lost/found matches for located reports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Only match reports from the last N days')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        located = Report.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        fields = ['pk', 'latitude', 'longitude', 'created_at', 'geo_cell', 'time_bucket']
+
+        # Keys first, so every report can be found as a candidate
+        updated, last_pk = 0, 0
+        while True:
+            rows = list(located.filter(pk__gt=last_pk).order_by('pk').only(*fields)[:options['batch_size']])
+            if not rows:
+                break
+            last_pk = rows[-1].pk
+            changed = [row for row in rows if matching.set_match_keys(row)]
+            Report.objects.bulk_update(changed, ['geo_cell', 'time_bucket'])
+            updated += len(changed)
+        self.stdout.write(f"Matching keys updated on {updated} report(s)")
+
+        to_match = located.filter(status__in=['open', 'investigating'], duplicate_of__isnull=True)
+        if options['days'] is not None:
+            to_match = to_match.filter(created_at__gte=timezone.now() - timedelta(days=options['days']))
+        matched = pairs = 0
+        for report in to_match.order_by('pk').iterator(chunk_size=options['batch_size']):
+            pairs += len(matching.match_report(report))
+            matched += 1
+        self.stdout.write(self.style.SUCCESS(f"Matched {matched} report(s): {pairs} pair(s) scored above the threshold"))
@@ -0,0 +1,103 @@
+"""
+Re-run AI recognition over report photos
+
+Reports with photos are streamed in primary-key order. Each batch is decoded
+in a process pool and classified with AnimalRecognizer.recognize_batch, then
+written back with a single bulk_update. The last finished primary key is
+saved to a checkpoint file, so an interrupted run resumes where it stopped.
+
+Usage: python manage.py reclassify_reports [--only-missing] [--workers 4] [--batch-size 64]
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from rescue.ai_recognition import get_recognizer
+from rescue.models import Report
+
+
+class Command(BaseCommand):
+    help = 'Classify report photos in bulk (e.g. after the recognizer changes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only-missing', action='store_true', help='Skip reports that already have a result')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Decoding processes')
+        parser.add_argument('--batch-size', type=int, default=64, help='Photos per classification batch and bulk_update')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many reports')
+        parser.add_argument(
+            '--checkpoint',
+            default=str(Path(settings.BASE_DIR) / '.reclassify_reports.json'),
+            help='File recording progress so an interrupted run can resume',
+        )
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+
+    def handle(self, *args, **options):
+        recognizer = get_recognizer()
+        checkpoint_path = Path(options['checkpoint'])
+        last_pk = 0
+        if checkpoint_path.exists() and not options['restart']:
+            last_pk = json.loads(checkpoint_path.read_text()).get('report', 0)
+
+        pending = Report.objects.exclude(photo='').exclude(photo__isnull=True)
+        if options['only_missing']:
+            pending = pending.filter(ai_identified_type__isnull=True)
+        remaining = pending.filter(pk__gt=last_pk).count()
+        if options['limit'] is not None:
+            remaining = min(remaining, options['limit'])
+        self.stdout.write(f"{remaining} report photo(s) to classify (resuming after pk {last_pk})")
+
+        totals = {'classified': 0, 'unreadable': 0}
+        processed = 0
+        start = time.monotonic()
+
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            while processed < remaining:
+                size = min(options['batch_size'], remaining - processed)
+                rows = list(
+                    pending.filter(pk__gt=last_pk)
+                    .order_by('pk')
+                    .only('pk', 'photo', 'ai_identified_type', 'ai_confidence')[:size]
+                )
+                if not rows:
+                    break
+
+                results = recognizer.recognize_batch(
+                    [row.photo.path for row in rows],
+                    batch_size=options['batch_size'],
+                    executor=pool,
+                )
+                changed = []
+                for row, (animal_type, confidence) in zip(rows, results):
+                    if animal_type is None:
+                        # Missing or corrupt file; leave any earlier result alone
+                        totals['unreadable'] += 1
+                        continue
+                    totals['classified'] += 1
+                    row.ai_identified_type = animal_type
+                    row.ai_confidence = confidence
+                    changed.append(row)
+
+                if changed:
+                    Report.objects.bulk_update(changed, ['ai_identified_type', 'ai_confidence'])
+
+                processed += len(rows)
+                last_pk = rows[-1].pk
+                checkpoint_path.write_text(json.dumps({'report': last_pk}))
+
+                elapsed = time.monotonic() - start
+                self.stdout.write(
+                    f"{processed}/{remaining} "
+                    f"({totals['classified']} classified, {totals['unreadable']} unreadable) "
+                    f"{processed / elapsed if elapsed else 0:.1f} images/s"
+                )
+
+        if options['limit'] is None and checkpoint_path.exists():
+            checkpoint_path.unlink()
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {totals['classified']} report(s) classified with {recognizer.version}"
+        ))
@@ -0,0 +1,53 @@
+"""
+Report how long each optional recognition backend takes to import
+
+Each module is imported in a fresh interpreter, so the figure is the full
+startup cost a process pays the first time that backend is used.
+
+Usage: python manage.py recognition_import_times [--repeat 3]
+"""
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+from rescue.recognition_backends import OPTIONAL_BACKENDS
+
+# Prints the import time in milliseconds, or "missing"
+TIMER = """
+import time
+start = time.perf_counter()
+try:
+    import {module}
+except ImportError:
+    print('missing')
+else:
+    print((time.perf_counter() - start) * 1000)
+"""
+
+
+class Command(BaseCommand):
+    help = 'Show the import cost (ms) of each optional image recognition backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per module; the fastest is reported')
+
+    def handle(self, *args, **options):
+        modules = [('recognizer module', 'rescue.ai_recognition'), ('pillow', 'PIL.Image')]
+        modules += [(name, module) for name, module in OPTIONAL_BACKENDS.items()]
+
+        for name, module in modules:
+            timings = []
+            for _ in range(options['repeat']):
+                output = subprocess.run(
+                    [sys.executable, '-c', TIMER.format(module=module)],
+                    capture_output=True, text=True,
+                ).stdout.strip()
+                if output in ('missing', ''):
+                    break
+                timings.append(float(output))
+
+            if timings:
+                self.stdout.write(f"{name:<20} {module:<24} {min(timings):>8.1f} ms")
+            else:
+                self.stdout.write(f"{name:<20} {module:<24} {'not installed':>11}")
@@ -0,0 +1,50 @@
+"""
+Repair drift in Shelter.unread_notification_count
+
+The counter is maintained by rescue/notification_utils.py and the
+Notification signal handlers. Queryset updates and raw SQL bypass both and
+leave it stale; this recounts unread rows and fixes the shelters that disagree.
+
+Usage: python manage.py reconcile_notification_counts [--batch-size 500] [--dry-run]
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from rescue.models import Shelter
+from rescue.notification_utils import reconcile_unread_counts, unread_count_subquery
+
+
+class Command(BaseCommand):
+    help = 'Recount unread notifications and fix shelters whose stored counter drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Shelters checked per query')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        checked, drifted, last_pk = 0, 0, 0
+        while True:
+            ids = list(
+                Shelter.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_pk = ids[-1]
+            checked += len(ids)
+            if options['dry_run']:
+                rows = (
+                    Shelter.objects.filter(pk__in=ids)
+                    .annotate(actual=unread_count_subquery())
+                    .exclude(unread_notification_count=F('actual'))
+                    .values_list('name', 'unread_notification_count', 'actual')
+                )
+                for name, stored, actual in rows:
+                    drifted += 1
+                    self.stdout.write(f"{name}: stored {stored}, actual {actual}")
+            else:
+                drifted += reconcile_unread_counts(ids)
+            self.stdout.write(f"{checked} shelter(s) checked, {drifted} drifted")
+
+        verb = 'would be fixed' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(f"{drifted} of {checked} shelter counter(s) {verb}"))
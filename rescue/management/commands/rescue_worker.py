@@ -0,0 +1,59 @@
+"""
+Background worker for the database-backed job queue (rescue/jobs.py)
+
+Usage: python manage.py rescue_worker [--once] [--batch 10] [--sleep 2]
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from rescue import geocoding
+from rescue.ai_recognition import warm_up
+from rescue.jobs import default_worker_id, run_pending
+from rescue.tasks import schedule_session_purge
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs (geocoding, image recognition, notifications)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--batch', type=int, default=10, help='Jobs claimed per poll')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        worker_id = default_worker_id()
+        # Pay the recognizer's import cost before the first photo job, not during it
+        recognizer = warm_up()
+        # Periodic jobs requeue themselves; make sure the chain is running
+        schedule_session_purge()
+        self.stdout.write(f"Worker {worker_id} started (recognizer: {recognizer.version})")
+        processed = 0
+
+        while not self._stopping:
+            close_old_connections()
+            claimed = run_pending(worker_id, limit=options['batch'])
+            processed += claimed
+            if claimed:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+
+        close_old_connections()
+        self.stdout.write(f"Worker {worker_id} stopped after {processed} job(s)")
+        stats = geocoding.get_stats()
+        self.stdout.write(
+            f"Geocoding: {stats['lookups']} lookup(s), {stats['hit_rate']:.0%} served from cache, "
+            f"{stats['upstream_calls']} external call(s)"
+        )
+
+    def _stop(self, signum, frame):
+        # Finish the job in hand, then exit
+        self._stopping = True
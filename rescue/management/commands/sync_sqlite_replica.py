@@ -0,0 +1,57 @@
+"""
+Copy the SQLite primary database into SQLite replica aliases
+
+Stands in for replication when trying the read-replica router locally:
+set DATABASE_REPLICA_URLS=sqlite:///db-replica.sqlite3, then run this once,
+or with --interval to keep copying (the gap between copies behaves like
+replication lag). Uses SQLite's online backup, so the primary stays usable.
+
+Usage: python manage.py sync_sqlite_replica [--interval 5] [--database replica_1]
+"""
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Copy the SQLite default database into each SQLite replica (local testing only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', action='append', help='Replica alias to sync (default: all SQLite replicas)')
+        parser.add_argument('--interval', type=float, default=0, help='Keep syncing every N seconds')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite; use real replication instead')
+        aliases = options['database'] or getattr(settings, 'DATABASE_REPLICAS', [])
+        targets = []
+        for alias in aliases:
+            if alias not in connections.databases:
+                raise CommandError(f"Unknown database alias: {alias}")
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f"{alias} is not a SQLite database")
+            targets.append(alias)
+        if not targets:
+            raise CommandError('No SQLite replicas configured (set DATABASE_REPLICA_URLS)')
+
+        while True:
+            for alias in targets:
+                self._copy(alias)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def _copy(self, alias):
+        # Drop our own handle so the copy is not blocked by it
+        connections[alias].close()
+        source = connections['default']
+        source.ensure_connection()
+        target = sqlite3.connect(str(connections[alias].settings_dict['NAME']))
+        try:
+            source.connection.backup(target)
+        finally:
+            target.close()
+        self.stdout.write(f"Copied default into {alias} ({connections[alias].settings_dict['NAME']})")
@@ -0,0 +1,207 @@
+"""
+Incremental lost/found report matching
+When a report is located, it is compared with reports of the opposite kind
+(lost vs. found or stray) for the same animal type. Candidates come from an
+indexed lookup on grid cell and week bucket, not a scan of every report.
+Each candidate is scored on type, distance, recency and description
+similarity, and pairs above MATCH_MIN_SCORE are stored as ReportMatch rows.
+Only open reports are matched; a report's matches are deleted when it is
+resolved or closed (rescue/signals.py) and rebuilt if it is reopened.
+"""
+import math
+import re
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Report, ReportMatch
+from .notification_utils import calculate_distance
+from .spatial_index import KM_PER_DEGREE
+
+# Report statuses that still take part in matching
+OPEN_STATUSES = ['open', 'investigating']
+
+OPPOSITE_TYPES = {
+    'lost': ['found', 'stray'],
+    'found': ['lost'],
+    'stray': ['lost'],
+}
+
+# Share of the score from each signal
+WEIGHTS = {
+    'type': 0.2,
+    'distance': 0.3,
+    'recency': 0.2,
+    'description': 0.3,
+}
+
+STOP_WORDS = {
+    'the', 'and', 'with', 'was', 'has', 'have', 'near', 'our', 'his', 'her',
+    'its', 'this', 'that', 'from', 'very', 'found', 'lost', 'seen', 'please',
+}
+
+
+def _cell_degrees():
+    return getattr(settings, 'MATCH_CELL_DEGREES', 0.25)
+
+
+def _bucket_days():
+    return getattr(settings, 'MATCH_TIME_BUCKET_DAYS', 7)
+
+
+def geo_cell(lat, lon):
+    cell = _cell_degrees()
+    return f"{math.floor(lat / cell)}:{math.floor(lon / cell)}"
+
+
+def time_bucket(moment):
+    return moment.date().toordinal() // _bucket_days()
+
+
+def nearby_cells(lat, lon, radius_km):
+    """Grid cells that may hold points within radius_km of (lat, lon)"""
+    cell = _cell_degrees()
+    row, col = math.floor(lat / cell), math.floor(lon / cell)
+    row_span = math.ceil(radius_km / (cell * KM_PER_DEGREE))
+    # Longitude degrees shrink towards the poles
+    cos_lat = max(math.cos(math.radians(min(abs(lat) + row_span * cell, 89.0))), 0.01)
+    col_span = min(math.ceil(radius_km / (cell * KM_PER_DEGREE * cos_lat)), math.ceil(180 / cell))
+    columns = math.ceil(360 / cell)
+    return [
+        f"{r}:{(c + columns // 2) % columns - columns // 2}"
+        for r in range(row - row_span, row + row_span + 1)
+        for c in range(col - col_span, col + col_span + 1)
+    ]
+
+
+def nearby_buckets(moment):
+    """Week buckets within MATCH_WINDOW_DAYS of a moment"""
+    window = getattr(settings, 'MATCH_WINDOW_DAYS', 30)
+    day = moment.date().toordinal()
+    return list(range((day - window) // _bucket_days(), (day + window) // _bucket_days() + 1))
+
+
+def tokens(text):
+    words = re.findall(r'[a-z]+', (text or '').lower())
+    return {word for word in words if len(word) > 2 and word not in STOP_WORDS}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def score_pair(report, candidate, distance_km):
+    """Score in [0, 1] that two reports describe the same animal"""
+    radius = getattr(settings, 'MATCH_RADIUS_KM', 25)
+    window = getattr(settings, 'MATCH_WINDOW_DAYS', 30)
+
+    # animal_type already matches; AI disagreement on both photos counts against
+    type_score = 1.0
+    if report.ai_identified_type and candidate.ai_identified_type and \
+            report.ai_identified_type != candidate.ai_identified_type:
+        type_score = 0.5
+    distance_score = max(0.0, 1 - distance_km / radius)
+    days_apart = abs((report.created_at - candidate.created_at).total_seconds()) / 86400
+    recency_score = max(0.0, 1 - days_apart / window)
+    description_score = jaccard(tokens(report.description), tokens(candidate.description))
+
+    return (
+        WEIGHTS['type'] * type_score
+        + WEIGHTS['distance'] * distance_score
+        + WEIGHTS['recency'] * recency_score
+        + WEIGHTS['description'] * description_score
+    )
+
+
+def set_match_keys(report):
+    """Fill geo_cell/time_bucket from the report's coordinates and date; returns changed field names"""
+    cell = geo_cell(float(report.latitude), float(report.longitude)) if report.latitude is not None else ''
+    bucket = time_bucket(report.created_at)
+    changed = []
+    if report.geo_cell != cell:
+        report.geo_cell = cell
+        changed.append('geo_cell')
+    if report.time_bucket != bucket:
+        report.time_bucket = bucket
+        changed.append('time_bucket')
+    return changed
+
+
+def candidate_reports(report):
+    """Open reports of the opposite kind, same animal type, in nearby cells and weeks"""
+    radius = getattr(settings, 'MATCH_RADIUS_KM', 25)
+    return Report.objects.filter(
+        report_type__in=OPPOSITE_TYPES[report.report_type],
+        animal_type=report.animal_type,
+        geo_cell__in=nearby_cells(float(report.latitude), float(report.longitude), radius),
+        time_bucket__in=nearby_buckets(report.created_at),
+        status__in=OPEN_STATUSES,
+    ).exclude(pk=report.pk).order_by().only(
+        'pk', 'report_type', 'latitude', 'longitude', 'description', 'ai_identified_type',
+        'created_at', 'duplicate_of',
+    )
+
+
+def match_report(report):
+    """
+    Score a located report against its candidates and store the matches
+    Safe to re-run: existing pairs are updated in place. Returns the matches.
+    """
+    if report.latitude is None or report.longitude is None or report.report_type not in OPPOSITE_TYPES:
+        return []
+    if report.status not in OPEN_STATUSES:
+        return []
+
+    changed = set_match_keys(report)
+    if changed:
+        Report.objects.filter(pk=report.pk).update(**{field: getattr(report, field) for field in changed})
+
+    radius = getattr(settings, 'MATCH_RADIUS_KM', 25)
+    min_score = getattr(settings, 'MATCH_MIN_SCORE', 0.4)
+    matches = []
+    for candidate in candidate_reports(report):
+        if candidate.duplicate_of_id:
+            # Reposts would only repeat their original's match
+            continue
+        distance = calculate_distance(report.latitude, report.longitude, candidate.latitude, candidate.longitude)
+        if distance is None or distance > radius:
+            continue
+        score = score_pair(report, candidate, distance)
+        if score < min_score:
+            continue
+        lost, found = (report, candidate) if report.report_type == 'lost' else (candidate, report)
+        matches.append(ReportMatch(lost_report=lost, found_report=found, score=score, distance_km=distance))
+
+    if matches:
+        ReportMatch.objects.bulk_create(
+            matches,
+            update_conflicts=True,
+            unique_fields=['lost_report', 'found_report'],
+            update_fields=['score', 'distance_km', 'updated_at'],
+        )
+    return matches
+
+
+def matches_for(report, limit=10):
+    """Best matches for a report as [{'report': other, 'score': percent, 'distance_km': ...}, ...]"""
+    # A counterpart closed by a queryset update may not have had its pairs removed yet
+    rows = ReportMatch.objects.filter(
+        Q(lost_report=report, found_report__status__in=OPEN_STATUSES)
+        | Q(found_report=report, lost_report__status__in=OPEN_STATUSES)
+    ).select_related('lost_report', 'found_report')[:limit]
+    return [
+        {
+            'report': match.found_report if match.lost_report_id == report.pk else match.lost_report,
+            'score': round(match.score * 100),
+            'distance_km': match.distance_km,
+        }
+        for match in rows
+    ]
+
+
+def forget_matches(report_id):
+    """Delete every pair a report is part of; returns the number deleted"""
+    deleted, _ = ReportMatch.objects.filter(Q(lost_report_id=report_id) | Q(found_report_id=report_id)).delete()
+    return deleted
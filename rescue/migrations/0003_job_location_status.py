@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:38
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def set_existing_location_status(apps, schema_editor):
+    """Rows created before the job queue were geocoded inline already"""
+    for model_name in ('Shelter', 'Report'):
+        model = apps.get_model('rescue', model_name)
+        model.objects.filter(latitude__isnull=False, longitude__isnull=False).update(location_status='located')
+        model.objects.filter(latitude__isnull=True).update(location_status='not_found')
+        model.objects.filter(longitude__isnull=True).update(location_status='not_found')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rescue', '0002_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='location_status',
+            field=models.CharField(choices=[('pending', 'Locating…'), ('located', 'Located'), ('not_found', 'Location not found')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='shelter',
+            name='location_status',
+            field=models.CharField(choices=[('pending', 'Locating…'), ('located', 'Located'), ('not_found', 'Location not found')], default='pending', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=5)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_by', models.CharField(blank=True, max_length=100)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['run_after'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='rescue_job_claim_idx')],
+            },
+        ),
+        migrations.RunPython(set_existing_location_status, migrations.RunPython.noop),
+    ]
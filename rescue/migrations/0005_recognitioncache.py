@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rescue', '0004_geocodecache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecognitionCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('classifier_version', models.CharField(max_length=100)),
+                ('animal_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('confidence', models.FloatField(default=0.0)),
+                ('features', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'unique_together': {('content_hash', 'classifier_version')},
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rescue', '0006_photo_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('distance_km', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-score'],
+            },
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='geo_cell',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='time_bucket',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['report_type', 'animal_type', 'geo_cell', 'time_bucket'], name='rescue_report_match_idx'),
+        ),
+        migrations.AddField(
+            model_name='reportmatch',
+            name='found_report',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lost_matches', to='rescue.report'),
+        ),
+        migrations.AddField(
+            model_name='reportmatch',
+            name='lost_report',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='found_matches', to='rescue.report'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='reportmatch',
+            unique_together={('lost_report', 'found_report')},
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:02
+
+from django.db import migrations
+import rescue.models
+
+# Columns and weights as of this migration; rescue.search.SEARCH_COLUMNS must match
+SEARCH_COLUMNS = {
+    'rescue_animal': [('name', 'A'), ('breed', 'B'), ('description', 'D')],
+    'rescue_report': [('city', 'A'), ('location', 'B'), ('description', 'D')],
+}
+
+
+def _document(columns, row):
+    return ' || '.join(
+        f"setweight(to_tsvector('english', coalesce({row}{column}, '')), '{weight}')"
+        for column, weight in columns
+    )
+
+
+def install_postgres_search(apps, schema_editor):
+    """
+    PostgreSQL only: a trigger keeps search_vector current on every insert
+    and update of the searched columns, and a GIN index serves @@ queries.
+    SQLite gets FTS5 tables from rescue.search.install_sqlite_fts after migrate
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, columns in SEARCH_COLUMNS.items():
+        column_list = ', '.join(column for column, _ in columns)
+        schema_editor.execute(
+            f"CREATE OR REPLACE FUNCTION {table}_search_update() RETURNS trigger AS $$ "
+            f"BEGIN NEW.search_vector := {_document(columns, 'NEW.')}; RETURN NEW; END "
+            f"$$ LANGUAGE plpgsql"
+        )
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_search_trigger ON {table}")
+        schema_editor.execute(
+            f"CREATE TRIGGER {table}_search_trigger BEFORE INSERT OR UPDATE OF {column_list} "
+            f"ON {table} FOR EACH ROW EXECUTE FUNCTION {table}_search_update()"
+        )
+        schema_editor.execute(f"UPDATE {table} SET search_vector = {_document(columns, '')}")
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} USING gin (search_vector)"
+        )
+
+
+def uninstall_postgres_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in SEARCH_COLUMNS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_search_idx")
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_search_trigger ON {table}")
+        schema_editor.execute(f"DROP FUNCTION IF EXISTS {table}_search_update()")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rescue', '0009_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animal',
+            name='search_vector',
+            field=rescue.models.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='search_vector',
+            field=rescue.models.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(install_postgres_search, uninstall_postgres_search),
+    ]
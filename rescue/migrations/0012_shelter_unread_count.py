@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_unread_notifications(apps, schema_editor):
+    Shelter = apps.get_model('rescue', 'Shelter')
+    Notification = apps.get_model('rescue', 'Notification')
+    unread = Notification.objects.filter(
+        shelter=OuterRef('pk'), is_read=False
+    ).order_by().values('shelter').annotate(total=Count('pk')).values('total')
+    Shelter.objects.update(unread_notification_count=Coalesce(Subquery(unread), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rescue', '0010_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shelter',
+            name='unread_notification_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_unread_notifications, migrations.RunPython.noop),
+    ]
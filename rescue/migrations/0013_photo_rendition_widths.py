@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rescue', '0012_shelter_unread_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animal',
+            name='photo_rendition_widths',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='photo_rendition_widths',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -1,9 +1,28 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 
+class SearchVectorField(models.TextField):
+    """
+    tsvector column on PostgreSQL, written by a trigger (see rescue/search.py);
+    an unused text column on other databases
+    """
+
+    def db_type(self, connection):
+        if connection.vendor == 'postgresql':
+            return 'tsvector'
+        return super().db_type(connection)
+
+
 class Shelter(models.Model):
+    LOCATION_STATUS_CHOICES = [
+        ('pending', 'Locating…'),
+        ('located', 'Located'),
+        ('not_found', 'Location not found'),
+    ]
+
     name = models.CharField(max_length=200)
     address = models.TextField()
     city = models.CharField(max_length=100)
@@ -14,12 +33,21 @@ class Shelter(models.Model):
     website = models.URLField(blank=True, null=True)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    location_status = models.CharField(max_length=20, choices=LOCATION_STATUS_CHOICES, default='pending')
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='shelter')
+    # Unread Notification rows, kept in step by rescue/notification_utils.py;
+    # `python manage.py reconcile_notification_counts` repairs any drift
+    unread_notification_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.name
 
+    @property
+    def geocode_query(self):
+        """Address string sent to the geocoder"""
+        return f"{self.address}, {self.city}, {self.state} {self.zip_code}"
+
     class Meta:
         ordering = ['name']
 
@@ -51,6 +79,13 @@ class Animal(models.Model):
     description = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
     photo = models.ImageField(upload_to='animals/', blank=True, null=True)
+    # Perceptual hash of the photo (rescue/photo_index.py), empty until computed
+    photo_hash = models.CharField(max_length=16, blank=True, default='', editable=False)
+    # Resized WebP/JPEG copies exist (rescue/renditions.py), and their actual widths
+    photo_renditions_ready = models.BooleanField(default=False, editable=False)
+    photo_rendition_widths = models.JSONField(default=dict, blank=True, editable=False)
+    # Full-text search document (rescue/search.py), maintained by the database
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
     shelter = models.ForeignKey(Shelter, on_delete=models.CASCADE, related_name='animals', null=True, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='animals_created')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -61,6 +96,10 @@ class Animal(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Available animals, newest first (home page, animal list)
+            models.Index(fields=['status', '-created_at', '-id'], name='rescue_animal_status_idx'),
+        ]
 
 
 class Report(models.Model):
@@ -79,7 +118,18 @@ class Report(models.Model):
     zip_code = models.CharField(max_length=10)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    location_status = models.CharField(max_length=20, choices=Shelter.LOCATION_STATUS_CHOICES, default='pending')
     photo = models.ImageField(upload_to='reports/', blank=True, null=True)
+    photo_hash = models.CharField(max_length=16, blank=True, default='', editable=False)
+    photo_renditions_ready = models.BooleanField(default=False, editable=False)
+    photo_rendition_widths = models.JSONField(default=dict, blank=True, editable=False)
+    # Lost/found matching keys (rescue/matching.py): grid cell of the
+    # coordinates and the week the report was made
+    geo_cell = models.CharField(max_length=32, blank=True, default='', editable=False)
+    time_bucket = models.IntegerField(null=True, blank=True, editable=False)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    # Earlier report this one reposts (same photo), flagged automatically
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='duplicates')
     reported_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reports')
     animal = models.ForeignKey(Animal, on_delete=models.SET_NULL, null=True, blank=True, related_name='reports')
     status = models.CharField(max_length=20, choices=[
@@ -96,8 +146,23 @@ class Report(models.Model):
     def __str__(self):
         return f"{self.get_report_type_display()} - {self.get_animal_type_display()} at {self.location}"
 
+    @property
+    def geocode_query(self):
+        """Address string sent to the geocoder"""
+        return f"{self.location}, {self.city}, {self.state} {self.zip_code}"
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Candidate lookup for lost/found matching
+            models.Index(fields=['report_type', 'animal_type', 'geo_cell', 'time_bucket'], name='rescue_report_match_idx'),
+            # Report list, unfiltered and filtered by type, newest first; id
+            # completes the keyset pagination key (rescue/pagination.py)
+            models.Index(fields=['-created_at', '-id'], name='rescue_report_created_idx'),
+            models.Index(fields=['report_type', 'animal_type', '-created_at', '-id'], name='rescue_report_type_idx'),
+            # Open reports on the home page
+            models.Index(fields=['status', '-created_at', '-id'], name='rescue_report_status_idx'),
+        ]
 
 
 class AdoptionRequest(models.Model):
@@ -159,5 +224,115 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # A shelter's notifications, newest first
+            models.Index(fields=['shelter', '-created_at', '-id'], name='rescue_notif_shelter_idx'),
+            # Unread counts and lists only touch unread rows
+            models.Index(
+                fields=['shelter', '-created_at', '-id'], condition=models.Q(is_read=False), name='rescue_notif_unread_idx',
+            ),
+        ]
+
+
+class Job(models.Model):
+    """
+    A unit of background work processed by `manage.py rescue_worker`
+    See rescue/jobs.py for enqueueing, claiming and retry behaviour
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ['run_after']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='rescue_job_claim_idx'),
+        ]
+
+
+class GeocodeCache(models.Model):
+    """
+    Persistent geocoding results keyed by normalized address
+    found=False rows are negative cache entries for addresses that did not resolve
+    """
+    key = models.CharField(max_length=64, unique=True)
+    query = models.TextField()
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    found = models.BooleanField(default=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.query
+
+    class Meta:
+        ordering = ['-updated_at']
+
+
+class RateLimit(models.Model):
+    """
+    The next free call slot for a rate-limited external service
+    Shared by every process; see SharedRateLimiter in rescue/geocoder_backends.py
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    # Unix timestamp of the earliest moment the next call may be made
+    next_slot = models.FloatField(default=0.0)
+
+    def __str__(self):
+        return self.name
+
+
+class RecognitionCache(models.Model):
+    """
+    Image recognition results keyed by a SHA-256 of the photo bytes
+    classifier_version is part of the key, so results from an older model are never reused
+    """
+    content_hash = models.CharField(max_length=64)
+    classifier_version = models.CharField(max_length=100)
+    animal_type = models.CharField(max_length=50, blank=True, null=True)
+    confidence = models.FloatField(default=0.0)
+    features = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.classifier_version}): {self.animal_type}"
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = ['content_hash', 'classifier_version']
 
 
+class ReportMatch(models.Model):
+    """A lost report paired with a found or stray report that may be the same animal"""
+    lost_report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='found_matches')
+    found_report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='lost_matches')
+    score = models.FloatField()
+    distance_km = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Lost #{self.lost_report_id} ~ found #{self.found_report_id} ({self.score:.2f})"
+
+    class Meta:
+        ordering = ['-score']
+        unique_together = ['lost_report', 'found_report']
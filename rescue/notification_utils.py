@@ -1,8 +1,14 @@
 """
 Utility functions for sending notifications to NGOs/Shelters
 """
+from collections import Counter
 from math import radians, cos, sin, asin, sqrt
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from .models import Notification, Shelter, Report, AdoptionRequest
+from .spatial_index import get_shelter_index
 
 
 def calculate_distance(lat1, lon1, lat2, lon2):
@@ -32,64 +38,169 @@ def calculate_distance(lat1, lon1, lat2, lon2):
 def get_nearby_shelters(latitude, longitude, radius_km=50):
     """
     Get all shelters within a specified radius (in kilometers)
+    Uses the in-memory spatial index so only shelters in nearby grid cells
+    are measured; results are sorted by distance
     """
     if not latitude or not longitude:
         return Shelter.objects.none()
     
-    nearby_shelters = []
-    all_shelters = Shelter.objects.filter(
-        latitude__isnull=False,
-        longitude__isnull=False
-    )
+    hits = get_shelter_index().within(float(latitude), float(longitude), radius_km)
+    return _shelters_for_hits(hits)
+
+
+def get_nearest_shelters(latitude, longitude, count=5, max_radius_km=None):
+    """
+    Get the `count` closest shelters, optionally capped to max_radius_km
+    """
+    if not latitude or not longitude:
+        return []
     
-    for shelter in all_shelters:
-        distance = calculate_distance(
-            latitude, longitude,
-            float(shelter.latitude), float(shelter.longitude)
-        )
-        if distance and distance <= radius_km:
-            nearby_shelters.append((shelter, distance))
+    hits = get_shelter_index().nearest(
+        float(latitude), float(longitude), k=count, max_radius_km=max_radius_km
+    )
+    return _shelters_for_hits(hits)
+
+
+def _shelters_for_hits(hits):
+    """Fetch shelters for index hits, preserving the distance ordering"""
+    shelters = Shelter.objects.in_bulk([pk for pk, distance in hits])
+    # A shelter deleted by another process may linger in this process's index
+    return [shelters[pk] for pk, distance in hits if pk in shelters]
+
+
+def create_notifications(notifications, batch_size=None):
+    """
+    Insert notifications with batched bulk_create calls in one transaction,
+    bumping each recipient shelter's unread counter in the same transaction
+    batch_size defaults to settings.NOTIFICATION_BULK_BATCH_SIZE
+    """
+    if not notifications:
+        return []
+    if batch_size is None:
+        batch_size = getattr(settings, 'NOTIFICATION_BULK_BATCH_SIZE', 500)
     
-    # Sort by distance
-    nearby_shelters.sort(key=lambda x: x[1])
-    return [shelter for shelter, distance in nearby_shelters]
+    with transaction.atomic():
+        created = Notification.objects.bulk_create(notifications, batch_size=batch_size)
+        increments = Counter(n.shelter_id for n in created if not n.is_read)
+        # One UPDATE per distinct increment; a fan-out gives every shelter +1
+        by_amount = {}
+        for shelter_id, amount in increments.items():
+            by_amount.setdefault(amount, []).append(shelter_id)
+        for amount, shelter_ids in by_amount.items():
+            Shelter.objects.filter(pk__in=shelter_ids).update(
+                unread_notification_count=F('unread_notification_count') + amount
+            )
+        return created
 
 
-def notify_nearby_shelters_about_report(report):
+def mark_notifications_read(shelter, notification_ids=None):
+    """
+    Mark a shelter's unread notifications read (all, or only notification_ids)
+    and take exactly the rows that changed off its unread counter
+    Returns the number of notifications marked.
+    """
+    with transaction.atomic():
+        unread = Notification.objects.filter(shelter=shelter, is_read=False)
+        if notification_ids is not None:
+            unread = unread.filter(pk__in=notification_ids)
+        # Rows another request already marked are not matched again, so
+        # concurrent calls cannot decrement twice
+        marked = unread.update(is_read=True)
+        if marked:
+            Shelter.objects.filter(pk=shelter.pk).update(
+                unread_notification_count=Greatest(F('unread_notification_count') - marked, 0)
+            )
+    return marked
+
+
+def adjust_unread_count(shelter_id, delta):
+    """Add `delta` (negative to take away) to a shelter's unread counter, never below zero"""
+    Shelter.objects.filter(pk=shelter_id).update(
+        unread_notification_count=Greatest(F('unread_notification_count') + delta, 0)
+    )
+
+
+def unread_count_subquery():
+    """Per-shelter COUNT of unread notifications, for Shelter querysets"""
+    unread = Notification.objects.filter(
+        shelter=OuterRef('pk'), is_read=False
+    ).order_by().values('shelter').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(unread), 0)
+
+
+def reconcile_unread_counts(shelter_ids=None):
+    """
+    Recompute stored unread counters from the Notification table; each
+    UPDATE counts and writes in one statement, so it is safe under load
+    Returns the number of shelters whose counter was wrong.
+    """
+    shelters = Shelter.objects.all()
+    if shelter_ids is not None:
+        shelters = shelters.filter(pk__in=shelter_ids)
+    drifted = list(
+        shelters.annotate(actual=unread_count_subquery())
+        .exclude(unread_notification_count=F('actual'))
+        .values_list('pk', flat=True)
+    )
+    if drifted:
+        Shelter.objects.filter(pk__in=drifted).update(unread_notification_count=unread_count_subquery())
+    return len(drifted)
+
+
+def notify_nearby_shelters_about_report(report, radius_km=50, batch_size=None):
     """
     Send notifications to all nearby shelters about a new report
+    Distances come straight from the spatial index (one computation per
+    shelter) and the message text is rendered once around the distance
     """
     if not report.latitude or not report.longitude:
-        return
+        return []
     
-    nearby_shelters = get_nearby_shelters(
+    hits = get_shelter_index().within(
         float(report.latitude),
         float(report.longitude),
-        radius_km=50  # 50km radius
+        radius_km
     )
+    if not hits:
+        return []
     
-    for shelter in nearby_shelters:
-        distance = calculate_distance(
-            float(report.latitude), float(report.longitude),
-            float(shelter.latitude), float(shelter.longitude)
-        )
-        
-        title = f"New {report.get_report_type_display()} Report Nearby"
-        message = (
-            f"A new {report.get_report_type_display().lower()} report has been submitted "
-            f"for a {report.get_animal_type_display().lower()} approximately {distance:.1f}km away.\n\n"
-            f"Location: {report.location}, {report.city}, {report.state}\n"
-            f"Description: {report.description[:200]}...\n\n"
-            f"Please check the report details and take appropriate action."
-        )
-        
-        Notification.objects.create(
+    # Skip shelters deleted by another process since this index was built,
+    # and shelters already notified in case this fan-out is being retried
+    already_notified = Notification.objects.filter(
+        report=report,
+        notification_type='new_report'
+    ).values('shelter_id')
+    existing = set(
+        Shelter.objects.filter(pk__in=[pk for pk, distance in hits])
+        .exclude(pk__in=already_notified)
+        .values_list('pk', flat=True)
+    )
+    
+    report_type = report.get_report_type_display()
+    title = f"New {report_type} Report Nearby"
+    message_head = (
+        f"A new {report_type.lower()} report has been submitted "
+        f"for a {report.get_animal_type_display().lower()} approximately "
+    )
+    message_tail = (
+        f"km away.\n\n"
+        f"Location: {report.location}, {report.city}, {report.state}\n"
+        f"Description: {report.description[:200]}...\n\n"
+        f"Please check the report details and take appropriate action."
+    )
+    
+    notifications = [
+        Notification(
             notification_type='new_report',
-            shelter=shelter,
+            shelter_id=shelter_pk,
             report=report,
             title=title,
-            message=message
+            message=f"{message_head}{distance:.1f}{message_tail}"
         )
+        for shelter_pk, distance in hits
+        if shelter_pk in existing
+    ]
+    return create_notifications(notifications, batch_size=batch_size)
 
 
 def notify_shelter_about_adoption_request(adoption_request):
@@ -109,35 +220,46 @@ def notify_shelter_about_adoption_request(adoption_request):
         f"Please review and respond to this request."
     )
     
-    Notification.objects.create(
+    create_notifications([Notification(
         notification_type='adoption_request',
         shelter=shelter,
         adoption_request=adoption_request,
         title=title,
         message=message
-    )
+    )])
 
 
-def notify_shelter_about_report_update(update):
+def notify_shelter_about_report_update(update, batch_size=None):
     """
-    Notify shelter about updates to reports they're following
+    Notify shelters about updates to reports they're following
+    Each shelter that was notified about the original report gets exactly one
+    update notification, except the shelter that posted the update
     """
     if not update.report:
-        return
+        return []
     
-    # Notify all shelters that were notified about the original report
-    notifications = Notification.objects.filter(
-        report=update.report,
-        notification_type='new_report'
+    # One DISTINCT query for the recipients, however many times each
+    # shelter was notified about the report
+    shelter_ids = (
+        Shelter.objects.filter(
+            notifications__report=update.report,
+            notifications__notification_type='new_report'
+        )
+        .exclude(user_id=update.created_by_id)
+        .order_by()
+        .values_list('pk', flat=True)
+        .distinct()
     )
     
-    for notification in notifications:
-        # Create update notification
-        Notification.objects.create(
+    title = f"Update on Report: {update.title}"
+    notifications = [
+        Notification(
             notification_type='report_update',
-            shelter=notification.shelter,
+            shelter_id=shelter_id,
             report=update.report,
-            title=f"Update on Report: {update.title}",
+            title=title,
             message=update.content
         )
-
+        for shelter_id in shelter_ids
+    ]
+    return create_notifications(notifications, batch_size=batch_size)
@@ -0,0 +1,140 @@
+"""
+Keyset (cursor) pagination for list pages
+Instead of OFFSET, each page continues from the sort key of the last row
+shown, so the database seeks straight to it through the ordering's index:
+page 500 costs the same as page 1. Next/previous links carry that key in a
+signed, opaque token. The total is optional and counted only up to
+PAGINATION_COUNT_LIMIT rows, so it stays cheap on large tables.
+"""
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import DateField, Q
+
+TOKEN_SALT = 'rescue.pagination'
+
+
+class KeysetPage:
+    """One page of rows plus tokens for its neighbours; iterates like a Page"""
+
+    def __init__(self, object_list, has_next, has_previous, next_token, previous_token, total=None,
+                 total_capped=False):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_token = next_token
+        self.previous_token = previous_token
+        # Row count, or None when not computed; a lower bound when total_capped
+        self.total = total
+        self.total_capped = total_capped
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by `ordering`, which must end in a unique field
+    (e.g. ('-created_at', '-id')); every field is read back from the rows,
+    so annotations such as search_rank may be used too
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-created_at', '-id'), count_limit=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        if count_limit is None:
+            count_limit = getattr(settings, 'PAGINATION_COUNT_LIMIT', 1000)
+        self.count_limit = count_limit
+        self._fields = [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def _encode(self, row, before):
+        values = []
+        for name, _ in self._fields:
+            value = getattr(row, name)
+            values.append(value.isoformat() if isinstance(value, (date, datetime)) else value)
+        return signing.dumps({'o': self.ordering, 'k': values, 'b': before}, salt=TOKEN_SALT, compress=True)
+
+    def _decode(self, token):
+        """(key values, before) from a token, or None if it is invalid or for another ordering"""
+        try:
+            payload = signing.loads(token, salt=TOKEN_SALT)
+        except signing.BadSignature:
+            return None
+        if not isinstance(payload, dict) or tuple(payload.get('o') or ()) != self.ordering:
+            return None
+        values = payload.get('k')
+        if not isinstance(values, list) or len(values) != len(self._fields):
+            return None
+        model_fields = {field.name: field for field in self.queryset.model._meta.concrete_fields}
+        try:
+            for i, (name, _) in enumerate(self._fields):
+                field = model_fields.get(name)
+                if isinstance(field, DateField) and values[i] is not None:
+                    parse = datetime.fromisoformat if field.get_internal_type() == 'DateTimeField' else date.fromisoformat
+                    values[i] = parse(values[i])
+        except (TypeError, ValueError):
+            return None
+        return values, bool(payload.get('b'))
+
+    def _seek(self, values, before):
+        """Rows strictly after (or before) a key in the page ordering"""
+        condition = Q()
+        for i, (name, descending) in enumerate(self._fields):
+            # Moving forward through a descending field means smaller values
+            lookup = 'lt' if descending != before else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[i]})
+            for j, (previous, _) in enumerate(self._fields[:i]):
+                step &= Q(**{previous: values[j]})
+            condition |= step
+        # The redundant range on the leading field lets the database seek its index
+        name, descending = self._fields[0]
+        bound = 'lte' if descending != before else 'gte'
+        return self.queryset.filter(Q(**{f'{name}__{bound}': values[0]}) & condition)
+
+    def get_page(self, token=None):
+        """The first page, or the page a next/previous token points to (first page if invalid)"""
+        decoded = self._decode(token) if token else None
+        if decoded is None:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_next, has_previous = len(rows) > self.per_page, False
+            rows = rows[:self.per_page]
+        else:
+            values, before = decoded
+            queryset = self._seek(values, before)
+            if before:
+                reverse = [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+                rows = list(queryset.order_by(*reverse)[:self.per_page + 1])
+                has_previous, has_next = len(rows) > self.per_page, True
+                rows = rows[:self.per_page][::-1]
+            else:
+                rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+                has_next, has_previous = len(rows) > self.per_page, True
+                rows = rows[:self.per_page]
+            if not rows:
+                # Everything past a stale token was deleted; start over
+                return self.get_page()
+
+        total, total_capped = None, False
+        if self.count_limit:
+            total = self.queryset.order_by()[:self.count_limit + 1].count()
+            total_capped = total > self.count_limit
+            total = min(total, self.count_limit)
+
+        return KeysetPage(
+            rows,
+            has_next=has_next and bool(rows),
+            has_previous=has_previous and bool(rows),
+            next_token=self._encode(rows[-1], before=False) if rows and has_next else '',
+            previous_token=self._encode(rows[0], before=True) if rows and has_previous else '',
+            total=total,
+            total_capped=total_capped,
+        )
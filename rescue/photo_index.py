@@ -0,0 +1,236 @@
+"""
+Perceptual photo hashes and an in-memory similarity index
+Every Report and Animal photo gets a 64-bit difference hash (dHash), which
+changes little under resizing, recompression and small edits. Hashes are
+kept in a multi-index hash table per model, so "photos within N bits of this
+one" queries probe a handful of buckets instead of comparing every photo.
+Blank, flat or plain-gradient photos hash to (nearly) all zeros or all ones
+and would all match each other, so such hashes are left out of matching.
+"""
+import functools
+import itertools
+import threading
+import time
+
+from django.conf import settings
+from PIL import Image
+
+from .ai_recognition import AnimalRecognizer
+
+HASH_SIZE = 8
+HASH_BITS = HASH_SIZE * HASH_SIZE
+
+
+def dhash(img):
+    """64-bit difference hash of a PIL image: is each pixel brighter than its right neighbour?"""
+    small = img.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def photo_hash(image_path):
+    """Hex dHash of an image file, decoded at a small size (JPEG draft mode)"""
+    img, _ = AnimalRecognizer.load_image(image_path, target_size=(64, 64))
+    return format(dhash(img), f'0{HASH_BITS // 4}x')
+
+
+def is_distinctive(value):
+    """Whether a hash has enough bits both set and clear to be worth matching"""
+    min_bits = getattr(settings, 'PHOTO_HASH_MIN_BITS', 8)
+    return min_bits <= bin(value).count('1') <= HASH_BITS - min_bits
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def similarity(distance):
+    """Hamming distance as a 0-100 similarity percentage"""
+    return round(100 * (1 - distance / HASH_BITS))
+
+
+@functools.lru_cache(maxsize=None)
+def _flip_masks(bits, max_flips):
+    """Every mask of `bits` width with at most max_flips bits set"""
+    masks = []
+    for flips in range(max_flips + 1):
+        for positions in itertools.combinations(range(bits), flips):
+            mask = 0
+            for position in positions:
+                mask |= 1 << position
+            masks.append(mask)
+    return tuple(masks)
+
+
+class MultiIndexHash:
+    """
+    Multi-index hashing over 64-bit hashes under Hamming distance
+    Each hash is split into `parts` 16-bit substrings, each with its own
+    table. Two hashes within r bits agree to within r // parts bits on at
+    least one substring (pigeonhole), so a search only probes those nearby
+    substring values and verifies the few candidates found, instead of
+    comparing against every photo.
+    """
+
+    def __init__(self, parts=4):
+        self.parts = parts
+        self.part_bits = HASH_BITS // parts
+        self._part_mask = (1 << self.part_bits) - 1
+        self._tables = [{} for _ in range(parts)]
+        self._hashes = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def _substrings(self, value):
+        return [(value >> (i * self.part_bits)) & self._part_mask for i in range(self.parts)]
+
+    def add(self, key, value):
+        with self._lock:
+            if self._hashes.get(key) == value:
+                return
+            self._discard(key)
+            self._hashes[key] = value
+            for table, substring in zip(self._tables, self._substrings(value)):
+                table.setdefault(substring, set()).add(key)
+
+    def remove(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key):
+        value = self._hashes.pop(key, None)
+        if value is None:
+            return
+        for table, substring in zip(self._tables, self._substrings(value)):
+            bucket = table.get(substring)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[substring]
+
+    def search(self, value, max_distance):
+        """Return [(key, distance), ...] within max_distance bits, closest first"""
+        masks = _flip_masks(self.part_bits, max_distance // self.parts)
+        results = []
+        with self._lock:
+            candidates = set()
+            for table, substring in zip(self._tables, self._substrings(value)):
+                for mask in masks:
+                    bucket = table.get(substring ^ mask)
+                    if bucket:
+                        candidates.update(bucket)
+            for key in candidates:
+                distance = hamming(value, self._hashes[key])
+                if distance <= max_distance:
+                    results.append((key, distance))
+        results.sort(key=lambda item: (item[1], item[0]))
+        return results
+
+
+# Process-wide indexes ('report' and 'animal'), built lazily and patched by
+# model signals. Each worker process holds its own copy, so they are also
+# rebuilt after PHOTO_INDEX_TTL seconds to pick up other processes' changes.
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _model(kind):
+    from .models import Animal, Report
+
+    return {'report': Report, 'animal': Animal}[kind]
+
+
+def rebuild_photo_index(kind):
+    """Load every hashed photo of one model into a fresh index and swap it in"""
+    index = MultiIndexHash()
+    rows = _model(kind).objects.exclude(photo_hash='').values_list('pk', 'photo_hash')
+    for pk, value in rows.iterator(chunk_size=2000):
+        if is_distinctive(int(value, 16)):
+            index.add(pk, int(value, 16))
+    with _indexes_lock:
+        _indexes[kind] = (index, time.monotonic())
+    return index
+
+
+def get_photo_index(kind):
+    """Return the index for 'report' or 'animal', (re)building it when missing or expired"""
+    entry = _indexes.get(kind)
+    ttl = getattr(settings, 'PHOTO_INDEX_TTL', 300)
+    if entry is None or (ttl and time.monotonic() - entry[1] > ttl):
+        return rebuild_photo_index(kind)
+    return entry[0]
+
+
+def update_photo(kind, pk, value):
+    """Patch an index after a row is saved"""
+    entry = _indexes.get(kind)
+    if entry is None:
+        return
+    if value and is_distinctive(int(value, 16)):
+        entry[0].add(pk, int(value, 16))
+    else:
+        entry[0].remove(pk)
+
+
+def remove_photo(kind, pk):
+    """Patch an index after a row is deleted"""
+    entry = _indexes.get(kind)
+    if entry is not None:
+        entry[0].remove(pk)
+
+
+def reset_photo_indexes():
+    """Drop the indexes; the next lookup rebuilds them"""
+    with _indexes_lock:
+        _indexes.clear()
+
+
+def find_similar(kind, value, max_distance=None, exclude_pk=None):
+    """Return [(pk, distance), ...] of photos within max_distance bits, closest first"""
+    if not value or not is_distinctive(int(value, 16)):
+        return []
+    if max_distance is None:
+        max_distance = getattr(settings, 'PHOTO_MATCH_DISTANCE', 10)
+    hits = get_photo_index(kind).search(int(value, 16), max_distance)
+    return [(pk, distance) for pk, distance in hits if pk != exclude_pk]
+
+
+def similar_objects(kind, value, exclude_pk=None, limit=6):
+    """Rows with similar photos as [{'object': ..., 'similarity': percent}, ...]"""
+    hits = find_similar(kind, value, exclude_pk=exclude_pk)[:limit]
+    objects = _model(kind).objects.in_bulk([pk for pk, _ in hits])
+    return [
+        {'object': objects[pk], 'similarity': similarity(distance)}
+        for pk, distance in hits if pk in objects
+    ]
+
+
+def find_original_report_id(report):
+    """
+    pk of the earliest earlier report of the same type whose photo is a
+    near-exact match (i.e. this report is a repost), or None
+    """
+    from .models import Report
+
+    hits = find_similar(
+        'report', report.photo_hash,
+        max_distance=getattr(settings, 'PHOTO_DUPLICATE_DISTANCE', 4),
+        exclude_pk=report.pk,
+    )
+    earlier = [pk for pk, _ in hits if pk < report.pk]
+    if not earlier:
+        return None
+    original = Report.objects.filter(
+        pk__in=earlier, report_type=report.report_type
+    ).order_by('pk').only('pk', 'duplicate_of_id').first()
+    if original is None:
+        return None
+    # Point reposts of a repost at the first report
+    return original.duplicate_of_id or original.pk
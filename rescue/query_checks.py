@@ -0,0 +1,217 @@
+"""
+Query-plan and query-count checks for the list pages
+Shared by rescue/tests.py, which fails the test run on a regression, and
+by the check_query_plans and check_query_budgets management commands for
+ad-hoc runs against a real database.
+"""
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import AdoptionRequest, Animal, Notification, Report, Shelter, Update
+from .pagination import KeysetPaginator
+from .search import search as full_text_search
+
+# Plan fragments that mean an index is missing or unusable
+FORBIDDEN = {
+    'sqlite': ['USE TEMP B-TREE'],
+    'postgresql': ['Seq Scan'],
+}
+
+# Queries ordered by search rank, which no index can provide
+RANKED = {'report search'}
+
+
+def _later_page(queryset, pages=3):
+    """The query for a later keyset page, as the list views run it"""
+    paginator = KeysetPaginator(queryset, 12, count_limit=0)
+    page = paginator.get_page()
+    for _ in range(pages - 1):
+        if not page.has_next:
+            break
+        page = paginator.get_page(page.next_token)
+    if not page.has_next:
+        return queryset.order_by(*paginator.ordering)[:13]
+    return paginator._seek(*paginator._decode(page.next_token)).order_by(*paginator.ordering)[:13]
+
+
+def hot_queries(shelter):
+    """[(label, queryset, {vendor: acceptable indexes}), ...] mirroring rescue/views.py"""
+    both = lambda *names: {'sqlite': names, 'postgresql': names}  # noqa: E731
+    newest = ('-created_at', '-id')
+    return [
+        ('available animals', Animal.objects.filter(status='available').order_by(*newest)[:12],
+         both('rescue_animal_status_idx')),
+        ('available animals by type',
+         Animal.objects.filter(status='available', animal_type='dog').order_by(*newest)[:12],
+         both('rescue_animal_status_idx')),
+        ('open reports', Report.objects.filter(status='open')[:6],
+         both('rescue_report_status_idx')),
+        ('report list', Report.objects.order_by(*newest)[:12],
+         both('rescue_report_created_idx')),
+        ('report list, later page', _later_page(Report.objects.all()),
+         both('rescue_report_created_idx')),
+        # Only three report types, so walking the date index is as good
+        ('reports by type', Report.objects.filter(report_type='lost').order_by(*newest)[:12],
+         both('rescue_report_type_idx', 'rescue_report_created_idx')),
+        ('reports by type and animal',
+         Report.objects.filter(report_type='lost', animal_type='dog').order_by(*newest)[:12],
+         both('rescue_report_type_idx')),
+        ('report search', full_text_search(Report.objects.all(), 'somewhere', city='pune').order_by('-search_rank')[:12],
+         {'sqlite': ('rescue_report_fts',), 'postgresql': ('rescue_report_search_idx',)}),
+        ('shelter notifications', Notification.objects.filter(shelter=shelter).order_by(*newest)[:20],
+         both('rescue_notif_shelter_idx')),
+        ('shelter notifications, later page', _later_page(Notification.objects.filter(shelter=shelter)),
+         both('rescue_notif_shelter_idx')),
+        ('unread notifications', Notification.objects.filter(shelter=shelter, is_read=False).order_by('-created_at')[:10],
+         both('rescue_notif_unread_idx')),
+    ]
+
+
+def plan_problems(vendor, label, plan, expected):
+    """(indexes used, problems) for one EXPLAIN output; no problems means the plan is fine"""
+    indexes = expected.get(vendor, ())
+    used = [index for index in indexes if index in plan]
+    problems = [fragment for fragment in FORBIDDEN[vendor] if fragment in plan]
+    if label in RANKED:
+        # Ranked results are sorted by relevance; only the sequential scan matters
+        problems = [fragment for fragment in problems if fragment != 'USE TEMP B-TREE']
+    if indexes and not used:
+        problems.append(f"{' or '.join(indexes)} not used")
+    return used, problems
+
+
+def seed_plan_data(rows, rng):
+    """Bulk-create users, shelters, animals, reports and notifications; returns one shelter"""
+    animal_types = [choice for choice, _ in Animal.ANIMAL_TYPES]
+    cities = ['Pune', 'Mumbai', 'Delhi', 'Chennai', 'Kolkata', 'Jaipur', 'Indore', 'Bhopal']
+
+    users = User.objects.bulk_create([
+        User(username=f'plan-check-{i}', email=f'plan-check-{i}@example.com') for i in range(20)
+    ])
+    shelters = Shelter.objects.bulk_create([
+        Shelter(
+            name=f'Shelter {i}', address='1 Main St', city=rng.choice(cities), state='MH',
+            zip_code='411001', phone='000', email=f'shelter-{i}@example.com', user=user,
+        )
+        for i, user in enumerate(users)
+    ])
+
+    Animal.objects.bulk_create([
+        Animal(
+            name=f'Animal {i}', animal_type=rng.choice(animal_types), gender='unknown',
+            description='Seeded', created_by=rng.choice(users),
+            status=rng.choices(['available', 'pending', 'adopted'], weights=[2, 1, 7])[0],
+        )
+        for i in range(rows)
+    ], batch_size=1000)
+    Report.objects.bulk_create([
+        Report(
+            report_type=rng.choice(['stray', 'lost', 'found']), animal_type=rng.choice(animal_types),
+            description='Seeded', location='Somewhere', city=rng.choice(cities), state='MH',
+            zip_code='411001', reported_by=rng.choice(users),
+            status=rng.choices(['open', 'investigating', 'resolved', 'closed'], weights=[2, 1, 4, 3])[0],
+        )
+        for _ in range(rows)
+    ], batch_size=1000)
+    Notification.objects.bulk_create([
+        Notification(
+            notification_type='new_report', shelter=rng.choice(shelters), title='Seeded',
+            message='Seeded', is_read=rng.random() < 0.9,
+        )
+        for _ in range(rows)
+    ], batch_size=1000)
+    return shelters[0]
+
+
+def analyze(vendor):
+    """Refresh planner statistics for the seeded rows"""
+    with connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            cursor.execute('ANALYZE rescue_animal, rescue_report, rescue_notification')
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        else:
+            cursor.execute('ANALYZE')
+
+
+# (label, url name, fixture object for the pk or None, who is logged in)
+PAGES = [
+    ('home', 'home', None, None),
+    ('animal list', 'animal_list', None, None),
+    ('animal detail', 'animal_detail', 'animal', 'adopter'),
+    ('report list', 'report_list', None, None),
+    ('report detail', 'report_detail', 'report', 'adopter'),
+    ('shelter dashboard', 'dashboard', None, 'shelter_user'),
+    ('user dashboard', 'dashboard', None, 'adopter'),
+    ('notifications', 'notifications', None, 'shelter_user'),
+    ('adoption request', 'adoption_request_manage', 'adoption_request', 'shelter_user'),
+]
+
+
+class Fixture:
+    """A shelter, an adopter and rows for every list, grown with grow()"""
+
+    def __init__(self):
+        self.created = 0
+        self.user_ids = []
+        self.shelter_user = self._user()
+        self.adopter = self._user()
+        self.shelter = Shelter.objects.create(
+            name='Budget Shelter', address='1 Main St', city='Pune', state='MH', zip_code='411001',
+            phone='000', email='shelter@example.com', user=self.shelter_user, location_status='located',
+        )
+        self.animal = self._animal()
+        self.report = self._report(self._user())
+        self.adoption_request = AdoptionRequest.objects.create(
+            animal=self._animal(), user=self._user(), message='Budget check',
+        )
+
+    def _user(self):
+        self.created += 1
+        user = User.objects.create(username=f'budget-{self.created}', email=f'budget-{self.created}@example.com')
+        self.user_ids.append(user.pk)
+        return user
+
+    def _animal(self):
+        return Animal.objects.create(
+            name='Budget', animal_type='dog', gender='unknown', description='Seeded',
+            shelter=self.shelter, created_by=self.shelter_user,
+        )
+
+    def _report(self, user):
+        return Report.objects.create(
+            report_type='stray', animal_type='dog', description='Seeded', location='Somewhere',
+            city='Pune', state='MH', zip_code='411001', reported_by=user,
+        )
+
+    def grow(self, count):
+        """Add `count` rows to every list, each pointing at its own related rows"""
+        for _ in range(count):
+            self._animal()
+            report = self._report(self.adopter)
+            adoption_request = AdoptionRequest.objects.create(
+                animal=self._animal(), user=self.adopter, message='Budget check',
+            )
+            Notification.objects.create(
+                notification_type='new_report', shelter=self.shelter, report=report,
+                title='Report', message='Seeded',
+            )
+            Notification.objects.create(
+                notification_type='adoption_request', shelter=self.shelter,
+                adoption_request=adoption_request, title='Request', message='Seeded',
+            )
+            for target in ({'animal': self.animal}, {'report': self.report}):
+                Update.objects.create(title='Update', content='Seeded', created_by=self._user(), **target)
+
+
+def render_page(fixture, url_name, target, who):
+    """GET one of PAGES; returns (url, response, captured queries)"""
+    client = Client()
+    if who:
+        client.force_login(getattr(fixture, who))
+    url = reverse(url_name, args=[getattr(fixture, target).pk] if target else [])
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    return url, response, queries
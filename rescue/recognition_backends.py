@@ -0,0 +1,348 @@
+"""
+Image recognition backends
+Each backend classifies decoded RGB images into animal types. Backends
+register themselves by name, and AnimalRecognizer uses the first available
+one in settings.RECOGNITION_BACKENDS order. The pure-NumPy backend
+classifies on colour-histogram and edge-density features with a linear
+softmax model whose weights are memory-mapped from a small .npz file
+(build it with `python manage.py build_numpy_classifier`).
+"""
+import hashlib
+import importlib
+import logging
+import os
+import struct
+import threading
+import zipfile
+
+from django.conf import settings
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+ANIMAL_CLASSES = ['dog', 'cat', 'bird', 'rabbit', 'other']
+
+DEFAULT_BACKEND_ORDER = ['tensorflow', 'numpy', 'opencv', 'pil']
+
+# Optional libraries are imported on first use rather than at module load:
+# TensorFlow alone adds seconds to every process that imports this module,
+# including migrate and other management commands
+OPTIONAL_BACKENDS = {
+    'numpy': 'numpy',
+    'opencv': 'cv2',
+    'tensorflow': 'tensorflow.keras',
+}
+
+_modules = {}
+_module_lock = threading.Lock()
+
+
+def load_backend(name):
+    """Import an optional library on first use; returns the module, or None if not installed"""
+    if name not in _modules:
+        with _module_lock:
+            if name not in _modules:
+                try:
+                    _modules[name] = importlib.import_module(OPTIONAL_BACKENDS[name])
+                except ImportError:
+                    _modules[name] = None
+    return _modules[name]
+
+
+def backend_available(name):
+    return load_backend(name) is not None
+
+
+_registry = {}
+
+
+def register_backend(name):
+    """Register a RecognitionBackend subclass under a name usable in RECOGNITION_BACKENDS"""
+    def decorator(cls):
+        cls.name = name
+        _registry[name] = cls
+        return cls
+    return decorator
+
+
+def get_backend_class(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ValueError(f"Unknown recognition backend: {name}")
+
+
+def available_backends():
+    return [name for name, cls in _registry.items() if cls.is_available()]
+
+
+def select_backend(order=None):
+    """Instantiate the first available backend in settings.RECOGNITION_BACKENDS order"""
+    order = order or getattr(settings, 'RECOGNITION_BACKENDS', DEFAULT_BACKEND_ORDER)
+    for name in order:
+        cls = get_backend_class(name)
+        if not cls.is_available():
+            continue
+        try:
+            return cls()
+        except Exception as e:
+            logger.warning(f"Recognition backend '{name}' failed to load: {e}")
+    return PILBackend()
+
+
+def file_digest(path):
+    """Short SHA-256 of a file, or of every file under a directory (e.g. a SavedModel)"""
+    is_dir = os.path.isdir(path)
+    if is_dir:
+        paths = sorted(
+            os.path.join(root, name) for root, _, names in os.walk(path) for name in names
+        )
+    else:
+        paths = [path]
+    digest = hashlib.sha256()
+    for file_path in paths:
+        if is_dir:
+            digest.update(os.path.relpath(file_path, path).encode())
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+class RecognitionBackend:
+    """
+    Backend interface: classify_batch(items) takes [(RGB PIL image, original
+    (width, height)), ...] and returns [(animal_type, confidence), ...] in order
+    """
+    name = None
+    # Bump when a backend's heuristics change so cached results expire
+    version = '1'
+
+    @classmethod
+    def is_available(cls):
+        return True
+
+    def classify(self, img, original_size):
+        return self.classify_batch([(img, original_size)])[0]
+
+    def classify_batch(self, items):
+        return [self.classify(img, original_size) for img, original_size in items]
+
+
+@register_backend('tensorflow')
+class TensorFlowBackend(RecognitionBackend):
+    """Keras model from settings.RECOGNITION_TF_MODEL, one predict() per batch"""
+    input_size = (224, 224)
+
+    @classmethod
+    def is_available(cls):
+        # Check for a model file first so TensorFlow is never imported without one
+        path = getattr(settings, 'RECOGNITION_TF_MODEL', '')
+        return bool(path) and os.path.exists(path) and backend_available('numpy') and backend_available('tensorflow')
+
+    def __init__(self, model_path=None):
+        self.model_path = model_path or settings.RECOGNITION_TF_MODEL
+        self.model = load_backend('tensorflow').models.load_model(self.model_path)
+        # A new model means new answers, so it gets its own cache entries
+        self.version = f"tf-{file_digest(self.model_path)}"
+
+    def classify_batch(self, items):
+        np = load_backend('numpy')
+        arrays = np.stack([np.asarray(img.resize(self.input_size)) for img, _ in items]) / 255.0
+        predictions = self.model.predict(arrays, verbose=0)
+        results = []
+        for scores in predictions:
+            class_idx = int(np.argmax(scores))
+            animal_type = ANIMAL_CLASSES[class_idx] if class_idx < len(ANIMAL_CLASSES) else 'other'
+            results.append((animal_type, float(scores[class_idx])))
+        return results
+
+
+# Feature layout for the numpy backend; bump when extract_features changes
+FEATURE_VERSION = 1
+HISTOGRAM_BINS = 64
+EDGE_THRESHOLD = 32
+
+
+def extract_features(batch, original_sizes=None):
+    """
+    Feature matrix (N×F float32) for an N×H×W×3 uint8 image array
+    Columns: 64-bin joint colour histogram (4 levels per channel), edge
+    density overall and per quadrant, mean gradient, then aspect ratio and
+    log pixel count of the original uploads
+    """
+    np = load_backend('numpy')
+    batch = np.asarray(batch, dtype=np.uint8)
+    n, height, width, _ = batch.shape
+
+    # Bin index computed in uint8 (fits 0-63); widening first is ~4x slower
+    levels = batch >> 6
+    bins = (levels[..., 0] << 4) | (levels[..., 1] << 2) | levels[..., 2]
+    bins = bins.reshape(n, -1).astype(np.intp) + (np.arange(n) * HISTOGRAM_BINS)[:, None]
+    histogram = np.bincount(bins.ravel(), minlength=n * HISTOGRAM_BINS).reshape(n, HISTOGRAM_BINS)
+    histogram = histogram / float(height * width)
+
+    gray = np.tensordot(batch, np.array([0.299, 0.587, 0.114], dtype=np.float32), axes=([3], [0]))
+    magnitude = np.abs(np.diff(gray, axis=2))[:, :-1, :] + np.abs(np.diff(gray, axis=1))[:, :, :-1]
+    edges = magnitude > EDGE_THRESHOLD
+    half_h, half_w = edges.shape[1] // 2, edges.shape[2] // 2
+    quadrants = edges[:, :2 * half_h, :2 * half_w].reshape(n, 2, half_h, 2, half_w).mean(axis=(2, 4)).reshape(n, 4)
+
+    if original_sizes is None:
+        original_sizes = [(width, height)] * n
+    sizes = np.asarray(original_sizes, dtype=np.float64)
+    aspect_ratio = sizes[:, 0] / np.maximum(sizes[:, 1], 1)
+    log_area = np.log1p(sizes[:, 0] * sizes[:, 1])
+
+    return np.column_stack([
+        histogram,
+        edges.mean(axis=(1, 2)),
+        quadrants,
+        magnitude.mean(axis=(1, 2)) / 255.0,
+        aspect_ratio,
+        log_area,
+    ]).astype(np.float32)
+
+
+def load_npz_mmap(path):
+    """
+    Memory-map every array in an uncompressed .npz (as written by numpy.savez)
+    np.load cannot memory-map archive members, so each member's data offset
+    is located in the zip and mapped read-only; every worker process then
+    shares the same pages instead of holding its own copy
+    """
+    np = load_backend('numpy')
+    readers = {
+        (1, 0): np.lib.format.read_array_header_1_0,
+        (2, 0): np.lib.format.read_array_header_2_0,
+    }
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: '{info.filename}' is compressed; write weights with numpy.savez")
+            # Local file header: 30 fixed bytes, then the name and extra field
+            f.seek(info.header_offset)
+            name_length, extra_length = struct.unpack('<HH', f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            shape, fortran_order, dtype = readers[np.lib.format.read_magic(f)](f)
+            if dtype.hasobject:
+                raise ValueError(f"{path}: '{info.filename}' holds Python objects")
+            arrays[info.filename[:-len('.npy')]] = np.memmap(
+                path, dtype=dtype, mode='r', shape=shape,
+                order='F' if fortran_order else 'C', offset=f.tell(),
+            )
+    return arrays
+
+
+def save_numpy_weights(path, weights, bias, mean, scale, classes):
+    """Write numpy backend weights in the uncompressed layout load_npz_mmap expects"""
+    np = load_backend('numpy')
+    with open(path, 'wb') as f:
+        np.savez(
+            f,
+            weights=np.asarray(weights, dtype=np.float32),
+            bias=np.asarray(bias, dtype=np.float32),
+            mean=np.asarray(mean, dtype=np.float32),
+            scale=np.asarray(scale, dtype=np.float32),
+            classes=np.asarray(classes, dtype='U16'),
+            feature_version=np.asarray([FEATURE_VERSION], dtype=np.int32),
+        )
+
+
+@register_backend('numpy')
+class NumpyBackend(RecognitionBackend):
+    """Linear softmax over extract_features(), vectorized across the whole batch"""
+    input_size = (128, 128)
+
+    @classmethod
+    def is_available(cls):
+        path = getattr(settings, 'RECOGNITION_NUMPY_WEIGHTS', '')
+        return bool(path) and os.path.exists(path) and backend_available('numpy')
+
+    def __init__(self, weights_path=None):
+        self.weights_path = weights_path or settings.RECOGNITION_NUMPY_WEIGHTS
+        arrays = load_npz_mmap(self.weights_path)
+        if int(arrays['feature_version'][0]) != FEATURE_VERSION:
+            raise ValueError(f"{self.weights_path} was built for different features; rebuild it")
+        self.weights = arrays['weights']
+        self.bias = arrays['bias']
+        self.mean = arrays['mean']
+        self.scale = arrays['scale']
+        self.classes = [str(name) for name in arrays['classes']]
+
+        # New weights mean new answers, so they get their own cache entries
+        self.version = f"{FEATURE_VERSION}-{file_digest(self.weights_path)}"
+
+    def predict(self, batch, original_sizes=None):
+        """Classify an N×H×W×3 uint8 array; returns [(animal_type, confidence), ...]"""
+        np = load_backend('numpy')
+        features = (extract_features(batch, original_sizes) - self.mean) / self.scale
+        logits = features @ self.weights + self.bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+        return [(self.classes[i], float(probabilities[row, i])) for row, i in enumerate(best)]
+
+    @classmethod
+    def to_array(cls, items):
+        """Stack decoded (image, original_size) items into an N×H×W×3 uint8 array"""
+        np = load_backend('numpy')
+        return np.stack([np.asarray(img.resize(cls.input_size, Image.BILINEAR)) for img, _ in items])
+
+    def classify_batch(self, items):
+        return self.predict(self.to_array(items), [original_size for _, original_size in items])
+
+
+@register_backend('opencv')
+class OpenCVBackend(RecognitionBackend):
+    """Largest-contour heuristic"""
+
+    @classmethod
+    def is_available(cls):
+        return backend_available('opencv') and backend_available('numpy')
+
+    def classify(self, img, original_size):
+        np = load_backend('numpy')
+        cv2 = load_backend('opencv')
+        width, height = original_size
+        aspect_ratio = width / height if height > 0 else 1
+
+        gray = cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2GRAY)
+        edges = cv2.Canny(gray, 50, 150)
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        area = cv2.contourArea(max(contours, key=cv2.contourArea)) if contours else 0
+        # Thresholds are in full-resolution pixels; scale up from the decoded size
+        area *= (width * height) / (img.width * img.height)
+
+        if area > 10000:
+            if aspect_ratio > 1.2:
+                return 'dog', 0.65
+            else:
+                return 'cat', 0.60
+        elif area > 5000:
+            return 'rabbit', 0.55
+        else:
+            return 'bird', 0.50
+
+
+@register_backend('pil')
+class PILBackend(RecognitionBackend):
+    """Image size and aspect ratio heuristic; always available"""
+
+    def classify(self, img, original_size):
+        width, height = original_size
+        aspect_ratio = width / height if height > 0 else 1
+        area = width * height
+
+        # Basic heuristics based on image size and aspect ratio
+        if area > 1000000:  # Large images
+            if aspect_ratio > 1.2:
+                return 'dog', 0.60
+            else:
+                return 'cat', 0.55
+        elif area > 500000:
+            return 'rabbit', 0.50
+        else:
+            return 'bird', 0.45
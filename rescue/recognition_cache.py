@@ -0,0 +1,104 @@
+"""
+Cache for image recognition results, keyed by a hash of the photo bytes
+The same photo uploaded again (several neighbours reporting one stray, a
+resubmitted form) is answered from an in-process LRU or the RecognitionCache
+table without decoding the image. The classifier version is part of the key,
+so changing the model invalidates old results automatically.
+"""
+import hashlib
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError
+
+from .ai_recognition import get_recognizer
+from .cache_utils import LRUCache
+from .models import RecognitionCache
+
+logger = logging.getLogger(__name__)
+
+_lru = LRUCache(maxsize=getattr(settings, 'RECOGNITION_LRU_SIZE', 512))
+
+_stats_lock = threading.Lock()
+_stats = {'lookups': 0, 'lru_hits': 0, 'db_hits': 0, 'misses': 0}
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    cached = stats['lru_hits'] + stats['db_hits']
+    stats['hit_rate'] = cached / stats['lookups'] if stats['lookups'] else 0.0
+    return stats
+
+
+def clear_memory_cache():
+    _lru.clear()
+
+
+def content_hash(image_path, chunk_size=1024 * 1024):
+    """SHA-256 of a file, read in chunks so large uploads are never held in memory"""
+    digest = hashlib.sha256()
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def analyze(image_path):
+    """
+    Same result as recognizer.analyze(image_path), served from cache when the
+    exact same bytes were analyzed before by the current classifier version
+    """
+    recognizer = get_recognizer()
+    try:
+        digest = content_hash(image_path)
+    except OSError:
+        return recognizer.analyze(image_path)
+
+    version = recognizer.version
+    key = (digest, version)
+    _count('lookups')
+
+    cached = _lru.get(key)
+    if cached is not None:
+        _count('lru_hits')
+        return dict(cached)
+
+    entry = RecognitionCache.objects.filter(content_hash=digest, classifier_version=version).first()
+    if entry is not None:
+        _count('db_hits')
+        result = {
+            'animal_type': entry.animal_type,
+            'confidence': entry.confidence,
+            'features': entry.features,
+        }
+        _lru.set(key, result)
+        return dict(result)
+
+    _count('misses')
+    result = recognizer.analyze(image_path)
+    if result['animal_type'] is None:
+        # Decoding failed; don't remember a transient error
+        return result
+
+    try:
+        RecognitionCache.objects.create(
+            content_hash=digest,
+            classifier_version=version,
+            animal_type=result['animal_type'],
+            confidence=result['confidence'],
+            features=result['features'],
+        )
+    except IntegrityError:
+        # Another worker analyzed the same photo concurrently
+        pass
+    except DatabaseError as e:
+        logger.warning(f"Could not cache recognition result for {digest[:12]}: {e}")
+    _lru.set(key, result)
+    return dict(result)
@@ -0,0 +1,103 @@
+"""
+Resized photo renditions for card grids and detail pages
+Each photo gets fixed-width renditions (see RENDITIONS) in WebP and JPEG,
+stored under their own prefix with deterministic names:
+animals/rex.jpg -> renditions/animals/rex.jpg.thumb.webp, ...thumb.jpg, ...
+Uploads never land under that prefix, so a rendition cannot collide with an
+original (an upload named rex.thumb.jpg stays untouched), and no file that
+a Report or Animal row references is ever overwritten or deleted.
+Templates pick between them with {% responsive_photo %}
+(rescue/templatetags/rescue_images.py).
+"""
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+# Rendition name -> width in pixels; height follows the photo's aspect ratio
+RENDITIONS = {
+    'thumb': 400,
+    'medium': 800,
+}
+
+WEBP_AVAILABLE = features.check('webp')
+
+# Extension -> (Pillow format, save options)
+FORMATS = {
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+if WEBP_AVAILABLE:
+    FORMATS['webp'] = ('WEBP', {'quality': 80, 'method': 4})
+
+
+RENDITION_PREFIX = 'renditions'
+
+
+def rendition_name(name, rendition, ext):
+    # The full original name keeps rex.jpg and rex.png apart
+    return f"{RENDITION_PREFIX}/{name}.{rendition}.{ext}"
+
+
+def rendition_names(name):
+    return [rendition_name(name, rendition, ext) for rendition in RENDITIONS for ext in FORMATS]
+
+
+def _referenced(names):
+    """Names among `names` that a photo row points at; these are never touched"""
+    from .models import Animal, Report
+
+    names = list(names)
+    referenced = set()
+    for model in (Animal, Report):
+        referenced.update(model.objects.filter(photo__in=names).values_list('photo', flat=True))
+    return referenced
+
+
+def _safe_to_replace(names):
+    """Refuse names outside the rendition prefix or referenced by a row"""
+    outside = [name for name in names if not name.startswith(f'{RENDITION_PREFIX}/')]
+    protected = outside + sorted(_referenced(names))
+    if protected:
+        raise ValueError(f"Refusing to overwrite or delete photo files: {', '.join(protected)}")
+
+
+def generate_renditions(field_file):
+    """
+    Write every rendition of an ImageField's file to its storage
+    The original is decoded once (JPEG draft mode at the largest rendition
+    size) and shrunk step by step from the largest rendition to the smallest.
+    Existing renditions are replaced, so this can be re-run safely.
+    Returns {rendition: width written}; photos are never enlarged, so a
+    small original yields renditions narrower than RENDITIONS says.
+    """
+    storage = field_file.storage
+    _safe_to_replace(rendition_names(field_file.name))
+    largest = max(RENDITIONS.values())
+    with storage.open(field_file.name, 'rb') as f:
+        img = Image.open(f)
+        if img.format == 'JPEG':
+            img.draft('RGB', (largest, largest))
+        # Phones store rotation in EXIF, which the renditions would lose
+        img = ImageOps.exif_transpose(img).convert('RGB')
+
+    widths = {}
+    for rendition, width in sorted(RENDITIONS.items(), key=lambda item: -item[1]):
+        # Very tall photos are capped at twice the width
+        img.thumbnail((width, width * 2), Image.LANCZOS)
+        widths[rendition] = img.width
+        for ext, (fmt, options) in FORMATS.items():
+            buffer = BytesIO()
+            img.save(buffer, fmt, **options)
+            name = rendition_name(field_file.name, rendition, ext)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(buffer.getvalue()))
+    return widths
+
+
+def delete_renditions(name, storage):
+    """Remove every rendition of a photo that has been replaced or deleted"""
+    _safe_to_replace(rendition_names(name))
+    for rendition in rendition_names(name):
+        if storage.exists(rendition):
+            storage.delete(rendition)
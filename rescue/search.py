@@ -0,0 +1,196 @@
+"""
+Ranked full-text search over animals and reports
+PostgreSQL: each table has a tsvector column (search_vector) kept current by
+a trigger and indexed with GIN (migration 0010). SQLite: an FTS5 table
+shadows each table through triggers (installed after every migrate, since
+SQLite table rebuilds drop triggers). Other databases, or SQLite builds
+without FTS5, fall back to icontains filters with no ranking.
+
+Every search term is a prefix match and all terms must match. Column
+filters (e.g. the report list's city box) are restricted to one column.
+"""
+import re
+import threading
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# Searchable columns per table, with their PostgreSQL weight label
+SEARCH_COLUMNS = {
+    'rescue_animal': [('name', 'A'), ('breed', 'B'), ('description', 'D')],
+    'rescue_report': [('city', 'A'), ('location', 'B'), ('description', 'D')],
+}
+
+TS_CONFIG = 'english'
+
+# FTS5 bm25() column weights for each label
+BM25_WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 2.0, 'D': 1.0}
+
+# Longer queries are truncated rather than building huge match expressions
+MAX_TERMS = 8
+
+_fts_tables = {}
+_fts_lock = threading.Lock()
+
+
+def terms(text):
+    """Lower-cased word tokens of user input; strips any query syntax"""
+    return re.findall(r'[^\W_]+', (text or '').lower())[:MAX_TERMS]
+
+
+def fts_table(table):
+    return f'{table}_fts'
+
+
+def install_sqlite_fts(connection):
+    """
+    Create the FTS5 tables and sync triggers that are missing, rebuilding
+    the index of any table whose triggers had to be (re)created.
+    Returns the tables rebuilt. No-op on other databases or without FTS5.
+    """
+    if connection.vendor != 'sqlite':
+        return []
+    rebuilt = []
+    with connection.cursor() as cursor:
+        existing = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master")}
+        for table, columns in SEARCH_COLUMNS.items():
+            if table not in existing:
+                continue
+            fts = fts_table(table)
+            names = [name for name, _ in columns]
+            column_list = ', '.join(names)
+            new_values = ', '.join(f'new.{name}' for name in names)
+            old_values = ', '.join(f'old.{name}' for name in names)
+            triggers = {
+                f'{fts}_ai': (
+                    f"AFTER INSERT ON {table} BEGIN "
+                    f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+                ),
+                f'{fts}_ad': (
+                    f"AFTER DELETE ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); END"
+                ),
+                f'{fts}_au': (
+                    f"AFTER UPDATE OF {column_list} ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+                    f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+                ),
+            }
+            if fts in existing and all(name in existing for name in triggers):
+                continue
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                    f"{column_list}, content='{table}', content_rowid='id', tokenize='porter unicode61')"
+                )
+            except Exception:
+                # SQLite compiled without FTS5; search falls back to icontains
+                break
+            for name, body in triggers.items():
+                cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            rebuilt.append(table)
+    reset_engine_cache()
+    return rebuilt
+
+
+def reset_engine_cache():
+    with _fts_lock:
+        _fts_tables.clear()
+
+
+def engine(connection, table):
+    """'postgresql', 'fts5' or None (icontains fallback) for a table on a connection"""
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor != 'sqlite':
+        return None
+    key = (connection.alias, table)
+    if key not in _fts_tables:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [fts_table(table)])
+            found = cursor.fetchone() is not None
+        with _fts_lock:
+            _fts_tables[key] = found
+    return 'fts5' if _fts_tables[key] else None
+
+
+def _postgres_query(text_terms, column_terms, weights):
+    parts = []
+    if text_terms:
+        parts.append(' & '.join(f'{term}:*' for term in text_terms))
+    for column, column_text in column_terms.items():
+        parts.extend(f'{term}:*{weights[column]}' for term in column_text)
+    return ' & '.join(f'({part})' if ' ' in part else part for part in parts)
+
+
+def _fts5_query(text_terms, column_terms):
+    parts = []
+    if text_terms:
+        parts.append(' AND '.join(f'"{term}"*' for term in text_terms))
+    for column, column_text in column_terms.items():
+        parts.extend(f'{column} : "{term}"*' for term in column_text)
+    return ' AND '.join(f'({part})' for part in parts)
+
+
+def search(queryset, text='', **columns):
+    """
+    Filter a queryset of Animal or Report to rows matching `text` in any
+    searchable column and each `column=text` in that column, annotated with
+    search_rank (higher is better; 0 on the fallback). Order by
+    '-search_rank' for ranked results. Blank input returns the queryset as is.
+    """
+    text_terms = terms(text)
+    column_terms = {column: terms(value) for column, value in columns.items() if terms(value)}
+    if not text_terms and not column_terms:
+        return queryset
+
+    table = queryset.model._meta.db_table
+    weights = dict(SEARCH_COLUMNS[table])
+    unknown = set(column_terms) - set(weights)
+    if unknown:
+        raise ValueError(f"Not searchable on {table}: {', '.join(sorted(unknown))}")
+
+    connection = connections[queryset.db]
+    qn = connection.ops.quote_name
+    kind = engine(connection, table)
+
+    if kind == 'postgresql':
+        query = _postgres_query(text_terms, column_terms, weights)
+        vector = f"{qn(table)}.{qn('search_vector')}"
+        # ts_rank is real; as float8 it compares exactly with the rank a
+        # pagination cursor carries back, so tied ranks still page correctly
+        return queryset.filter(
+            RawSQL(f"{vector} @@ to_tsquery('{TS_CONFIG}', %s)", (query,), output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({vector}, to_tsquery('{TS_CONFIG}', %s))::float8", (query,), output_field=FloatField()
+            )
+        )
+
+    if kind == 'fts5':
+        query = _fts5_query(text_terms, column_terms)
+        fts = qn(fts_table(table))
+        bm25_weights = ', '.join(str(BM25_WEIGHTS[label]) for _, label in SEARCH_COLUMNS[table])
+        # bm25() is lower for better matches
+        return queryset.filter(
+            RawSQL(f"{qn(table)}.{qn('id')} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)",
+                   (query,), output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(
+                f"(SELECT -bm25({fts}, {bm25_weights}) FROM {fts} "
+                f"WHERE {fts} MATCH %s AND {fts}.rowid = {qn(table)}.{qn('id')})",
+                (query,), output_field=FloatField(),
+            )
+        )
+
+    for term in text_terms:
+        any_column = Q()
+        for column in weights:
+            any_column |= Q(**{f'{column}__icontains': term})
+        queryset = queryset.filter(any_column)
+    for column, column_text in column_terms.items():
+        for term in column_text:
+            queryset = queryset.filter(**{f'{column}__icontains': term})
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
@@ -0,0 +1,169 @@
+"""
+Model signal handlers for keeping in-memory indexes, search tables, report
+matches, the user cache and shelters' unread counters in sync
+"""
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save
+from django.dispatch import receiver
+
+from .models import Animal, Notification, Report, Shelter
+from . import matching, photo_index, search, spatial_index
+from .identity import forget_users
+from .jobs import enqueue
+from .notification_utils import adjust_unread_count
+
+
+@receiver(post_save, sender=Shelter)
+def shelter_saved(sender, instance, **kwargs):
+    """Patch the nearby-shelter index once the save is committed"""
+    transaction.on_commit(lambda: spatial_index.update_shelter(instance))
+
+
+@receiver(post_delete, sender=Shelter)
+def shelter_deleted(sender, instance, **kwargs):
+    """Drop a deleted shelter from the nearby-shelter index"""
+    shelter_pk = instance.pk
+    transaction.on_commit(lambda: spatial_index.remove_shelter(shelter_pk))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    """Drop the cached user, e.g. after a password change or deactivation"""
+    forget_users([instance.pk])
+
+
+@receiver(post_save, sender=Shelter)
+@receiver(post_delete, sender=Shelter)
+def shelter_changed(sender, instance, **kwargs):
+    """Drop the cached user, which records whether they have a shelter"""
+    forget_users([instance.user_id])
+
+
+@receiver(post_save, sender=Report)
+@receiver(post_save, sender=Animal)
+def photo_saved(sender, instance, **kwargs):
+    """Patch the similar-photo index once the save is committed"""
+    kind = sender.__name__.lower()
+    pk, value = instance.pk, instance.photo_hash
+    transaction.on_commit(lambda: photo_index.update_photo(kind, pk, value))
+
+
+@receiver(post_delete, sender=Report)
+@receiver(post_delete, sender=Animal)
+def photo_deleted(sender, instance, **kwargs):
+    """Drop a deleted row from the similar-photo index"""
+    kind, pk = sender.__name__.lower(), instance.pk
+    transaction.on_commit(lambda: photo_index.remove_photo(kind, pk))
+
+
+def _loaded_photo_name(instance):
+    """The photo name as loaded, or None when the field was deferred (no query)"""
+    value = instance.__dict__.get('photo')
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Report)
+@receiver(post_init, sender=Animal)
+def remember_photo(sender, instance, **kwargs):
+    """Note the photo a row was loaded with, to spot replacements on save"""
+    if 'photo' in instance.__dict__:
+        instance._original_photo = _loaded_photo_name(instance)
+
+
+@receiver(post_save, sender=Report)
+@receiver(post_save, sender=Animal)
+def photo_replaced(sender, instance, update_fields=None, **kwargs):
+    """Queue removal of the old photo's renditions once a new photo is saved"""
+    if update_fields is not None and 'photo' not in update_fields:
+        return
+    old = getattr(instance, '_original_photo', '')
+    new = _loaded_photo_name(instance)
+    instance._original_photo = new
+    if old and old != new:
+        kind = sender.__name__.lower()
+        transaction.on_commit(lambda: enqueue('delete_photo_renditions', kind=kind, photo=old))
+
+
+@receiver(post_delete, sender=Report)
+@receiver(post_delete, sender=Animal)
+def photo_row_deleted(sender, instance, **kwargs):
+    """Queue removal of a deleted row's renditions"""
+    name = _loaded_photo_name(instance)
+    if name:
+        kind = sender.__name__.lower()
+        transaction.on_commit(lambda: enqueue('delete_photo_renditions', kind=kind, photo=name))
+
+
+@receiver(post_init, sender=Report)
+def remember_status(sender, instance, **kwargs):
+    """Note the status a report was loaded with, to spot it closing or reopening"""
+    instance._original_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Report)
+def report_status_changed(sender, instance, created, update_fields=None, **kwargs):
+    """Drop a closed report's matches, and rebuild them if it is reopened"""
+    if created or (update_fields is not None and 'status' not in update_fields):
+        return
+    old, new = getattr(instance, '_original_status', None), instance.__dict__.get('status')
+    instance._original_status = new
+    if old is None or new is None or (old in matching.OPEN_STATUSES) == (new in matching.OPEN_STATUSES):
+        return
+    if new in matching.OPEN_STATUSES:
+        report_id = instance.pk
+        transaction.on_commit(lambda: enqueue('match_report', report_id=report_id))
+    else:
+        matching.forget_matches(instance.pk)
+
+
+def _unread_state(instance):
+    """(shelter_id, is_read) as loaded, or None when either field was deferred"""
+    values = instance.__dict__
+    if 'shelter_id' in values and 'is_read' in values:
+        return values['shelter_id'], values['is_read']
+    return None
+
+
+@receiver(post_init, sender=Notification)
+def remember_unread(sender, instance, **kwargs):
+    """Note the shelter and read state a stored notification was loaded with"""
+    instance._original_unread = _unread_state(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Count a new unread notification, and move an edited one (e.g. in the
+    admin) on or off the unread counters; bulk_create and queryset updates
+    send no post_save and adjust the counters themselves
+    """
+    if raw or (update_fields is not None and not {'is_read', 'shelter', 'shelter_id'} & set(update_fields)):
+        return
+    old = None if created else getattr(instance, '_original_unread', None)
+    new = _unread_state(instance)
+    instance._original_unread = new
+    if old is None and not created:
+        # Loaded with deferred fields, so the change is unknown; reconciling fixes it
+        return
+    if old == new:
+        return
+    if old is not None and not old[1]:
+        adjust_unread_count(old[0], -1)
+    if new is not None and not new[1]:
+        adjust_unread_count(new[0], 1)
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    """Take a deleted unread notification, including cascades, off its shelter's counter"""
+    if instance.__dict__.get('is_read') is False:
+        adjust_unread_count(instance.shelter_id, -1)
+
+
+@receiver(post_migrate)
+def install_search_tables(sender, using, **kwargs):
+    """(Re)create SQLite FTS5 search tables; migrations that rebuild a table drop its triggers"""
+    if sender.name == 'rescue':
+        search.install_sqlite_fts(connections[using])
@@ -0,0 +1,258 @@
+"""
+In-memory spatial index for nearby-shelter lookups
+Buckets coordinates into a fixed latitude/longitude grid so radius and
+k-nearest queries only measure the points in the cells around the query,
+using a vectorized haversine pass when NumPy is available
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+
+# Optional NumPy import (vectorized distance pass over candidate cells)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_KM / 360
+HALF_CIRCUMFERENCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+def haversine_many(lat, lon, lats, lons):
+    """
+    Great circle distance in kilometers from one point (decimal degrees)
+    to many points given as radians. Returns an array (or list without NumPy)
+    """
+    lat1 = math.radians(lat)
+    lon1 = math.radians(lon)
+    if NUMPY_AVAILABLE:
+        a = (np.sin((lats - lat1) / 2) ** 2
+             + math.cos(lat1) * np.cos(lats) * np.sin((lons - lon1) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    cos_lat1 = math.cos(lat1)
+    distances = []
+    for lat2, lon2 in zip(lats, lons):
+        a = (math.sin((lat2 - lat1) / 2) ** 2
+             + cos_lat1 * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+        distances.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0))))
+    return distances
+
+
+class GridIndex:
+    """
+    Grid-bucketed point index keyed by an arbitrary hashable key (e.g. a pk)
+    Each cell is cell_size_deg x cell_size_deg; the longitude span searched
+    widens with latitude so radius queries stay exact near the poles
+    """
+
+    def __init__(self, cell_size_deg=0.5):
+        self.cell_size = cell_size_deg
+        self._rows = int(math.ceil(180 / cell_size_deg))
+        self._cols = int(math.ceil(360 / cell_size_deg))
+        self._cells = {}      # (row, col) -> {key: (lat, lon)}
+        self._arrays = {}     # (row, col) -> (keys, lats, lons) in radians
+        self._locations = {}  # key -> (row, col)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._locations)
+
+    def __contains__(self, key):
+        return key in self._locations
+
+    def _row(self, lat):
+        row = int(math.floor((lat + 90) / self.cell_size))
+        return min(max(row, 0), self._rows - 1)
+
+    def _col(self, lon):
+        return int(math.floor((lon + 180) / self.cell_size)) % self._cols
+
+    def cell_for(self, lat, lon):
+        return self._row(lat), self._col(lon)
+
+    def insert(self, key, lat, lon):
+        """Add a point, or move it if the key is already indexed"""
+        with self._lock:
+            self._discard(key)
+            cell = self.cell_for(lat, lon)
+            self._cells.setdefault(cell, {})[key] = (lat, lon)
+            self._arrays.pop(cell, None)
+            self._locations[key] = cell
+
+    def remove(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key):
+        cell = self._locations.pop(key, None)
+        if cell is None:
+            return
+        points = self._cells[cell]
+        del points[key]
+        if not points:
+            del self._cells[cell]
+        self._arrays.pop(cell, None)
+
+    def _candidate_cells(self, lat, lon, radius_km):
+        dlat = radius_km / KM_PER_DEGREE
+        row_min = self._row(lat - dlat)
+        row_max = self._row(lat + dlat)
+
+        # Degrees of longitude shrink towards the poles, so widen the span
+        # using the most poleward latitude the search circle can reach
+        max_abs_lat = min(abs(lat) + dlat, 90)
+        cos_lat = math.cos(math.radians(max_abs_lat))
+        if cos_lat < 1e-6 or dlat / cos_lat >= 180:
+            cols = None
+        else:
+            dlon = dlat / cos_lat
+            first = int(math.floor((lon - dlon + 180) / self.cell_size))
+            last = int(math.floor((lon + dlon + 180) / self.cell_size))
+            cols = {col % self._cols for col in range(first, last + 1)}
+
+        # When the search window covers more cells than are occupied, it is
+        # cheaper to filter the occupied cells than to probe the window
+        n_window = (row_max - row_min + 1) * (len(cols) if cols is not None else self._cols)
+        if n_window > len(self._cells):
+            return [
+                cell for cell in self._cells
+                if row_min <= cell[0] <= row_max and (cols is None or cell[1] in cols)
+            ]
+        if cols is None:
+            cols = range(self._cols)
+        return [
+            (row, col)
+            for row in range(row_min, row_max + 1)
+            for col in cols
+            if (row, col) in self._cells
+        ]
+
+    def _cell_arrays(self, cell):
+        arrays = self._arrays.get(cell)
+        if arrays is None:
+            points = self._cells[cell]
+            keys = list(points)
+            lats = [math.radians(points[key][0]) for key in keys]
+            lons = [math.radians(points[key][1]) for key in keys]
+            if NUMPY_AVAILABLE:
+                lats = np.array(lats, dtype=np.float64)
+                lons = np.array(lons, dtype=np.float64)
+            arrays = (keys, lats, lons)
+            self._arrays[cell] = arrays
+        return arrays
+
+    def within(self, lat, lon, radius_km):
+        """Return [(key, distance_km), ...] within radius_km, nearest first"""
+        with self._lock:
+            keys = []
+            lat_parts = []
+            lon_parts = []
+            for cell in self._candidate_cells(lat, lon, radius_km):
+                cell_keys, cell_lats, cell_lons = self._cell_arrays(cell)
+                keys.extend(cell_keys)
+                lat_parts.append(cell_lats)
+                lon_parts.append(cell_lons)
+
+        if not keys:
+            return []
+
+        if NUMPY_AVAILABLE:
+            distances = haversine_many(lat, lon, np.concatenate(lat_parts), np.concatenate(lon_parts))
+            hits = np.flatnonzero(distances <= radius_km)
+            hits = hits[np.argsort(distances[hits], kind='stable')]
+            return [(keys[i], float(distances[i])) for i in hits]
+
+        lats = [value for part in lat_parts for value in part]
+        lons = [value for part in lon_parts for value in part]
+        distances = haversine_many(lat, lon, lats, lons)
+        results = [(key, d) for key, d in zip(keys, distances) if d <= radius_km]
+        results.sort(key=lambda item: item[1])
+        return results
+
+    def nearest(self, lat, lon, k=1, max_radius_km=None):
+        """
+        Return the k nearest [(key, distance_km), ...], nearest first
+        Grows the search radius until k points fall inside it, which makes the
+        result exact: nothing outside the radius can beat the k-th hit
+        """
+        if k <= 0 or not self._locations:
+            return []
+        limit = HALF_CIRCUMFERENCE_KM if max_radius_km is None else min(max_radius_km, HALF_CIRCUMFERENCE_KM)
+        radius = min(self.cell_size * KM_PER_DEGREE, limit)
+        while True:
+            results = self.within(lat, lon, radius)
+            if len(results) >= k or radius >= limit:
+                return results[:k]
+            radius = min(radius * 2, limit)
+
+
+# Process-wide shelter index, built lazily and patched by model signals.
+# Each worker process holds its own copy, so it is also rebuilt after
+# SHELTER_INDEX_TTL seconds to pick up changes made by other processes.
+_shelter_index = None
+_shelter_index_built_at = 0.0
+_shelter_index_lock = threading.Lock()
+
+
+def _index_ttl():
+    return getattr(settings, 'SHELTER_INDEX_TTL', 300)
+
+
+def rebuild_shelter_index():
+    """Load every geocoded shelter into a fresh index and swap it in"""
+    global _shelter_index, _shelter_index_built_at
+    from .models import Shelter
+
+    index = GridIndex(cell_size_deg=getattr(settings, 'SHELTER_INDEX_CELL_DEGREES', 0.5))
+    rows = Shelter.objects.filter(
+        latitude__isnull=False,
+        longitude__isnull=False
+    ).values_list('pk', 'latitude', 'longitude')
+    for pk, latitude, longitude in rows.iterator(chunk_size=2000):
+        index.insert(pk, float(latitude), float(longitude))
+
+    with _shelter_index_lock:
+        _shelter_index = index
+        _shelter_index_built_at = time.monotonic()
+    return index
+
+
+def get_shelter_index():
+    """Return the shelter index, (re)building it when missing or expired"""
+    index = _shelter_index
+    ttl = _index_ttl()
+    if index is None or (ttl and time.monotonic() - _shelter_index_built_at > ttl):
+        index = rebuild_shelter_index()
+    return index
+
+
+def update_shelter(shelter):
+    """Patch the index after a shelter is saved"""
+    index = _shelter_index
+    if index is None:
+        return
+    if shelter.latitude is not None and shelter.longitude is not None:
+        index.insert(shelter.pk, float(shelter.latitude), float(shelter.longitude))
+    else:
+        index.remove(shelter.pk)
+
+
+def remove_shelter(shelter_pk):
+    """Patch the index after a shelter is deleted"""
+    index = _shelter_index
+    if index is not None:
+        index.remove(shelter_pk)
+
+
+def reset_shelter_index():
+    """Drop the index; the next lookup rebuilds it"""
+    global _shelter_index
+    with _shelter_index_lock:
+        _shelter_index = None
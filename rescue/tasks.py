@@ -0,0 +1,173 @@
+"""
+Background job handlers for slow report and shelter side effects
+Handlers may run more than once for the same payload (see rescue/jobs.py),
+so each one re-reads its row and skips work that is already done
+"""
+from importlib import import_module
+
+from django.conf import settings
+
+from .geocoding import geocode
+from .jobs import job, enqueue
+from .models import Animal, Job, Report, Shelter
+from . import matching, photo_index, recognition_cache, renditions
+from .notification_utils import notify_nearby_shelters_about_report
+
+
+def _mark_not_found(model, pk):
+    model.objects.filter(pk=pk, location_status='pending').update(location_status='not_found')
+
+
+def _shelter_not_found(shelter_id):
+    _mark_not_found(Shelter, shelter_id)
+
+
+def _report_not_found(report_id):
+    _mark_not_found(Report, report_id)
+
+
+@job('geocode_shelter', on_failure=_shelter_not_found)
+def geocode_shelter(shelter_id):
+    """Look up coordinates for a shelter address"""
+    shelter = Shelter.objects.filter(pk=shelter_id).first()
+    if shelter is None or shelter.location_status == 'located':
+        return
+
+    # Geocoder timeouts propagate so the job is retried
+    coordinates = geocode(shelter.geocode_query)
+    if coordinates:
+        shelter.latitude, shelter.longitude = coordinates
+        shelter.location_status = 'located'
+    else:
+        shelter.location_status = 'not_found'
+    # save() rather than update() so the spatial index signal fires
+    shelter.save(update_fields=['latitude', 'longitude', 'location_status'])
+
+
+@job('geocode_report', on_failure=_report_not_found)
+def geocode_report(report_id):
+    """Look up coordinates for a report, then fan out shelter notifications"""
+    report = Report.objects.filter(pk=report_id).first()
+    if report is None:
+        return
+
+    if report.location_status != 'located':
+        # Geocoder timeouts propagate so the job is retried
+        coordinates = geocode(report.geocode_query)
+        if coordinates:
+            report.latitude, report.longitude = coordinates
+            report.location_status = 'located'
+        else:
+            report.location_status = 'not_found'
+        report.save(update_fields=['latitude', 'longitude', 'location_status', 'updated_at'])
+
+    if report.location_status == 'located':
+        enqueue('notify_nearby_shelters', report_id=report.pk)
+        enqueue('match_report', report_id=report.pk)
+
+
+@job('notify_nearby_shelters')
+def notify_nearby_shelters(report_id):
+    """Notify shelters near a located report"""
+    report = Report.objects.filter(pk=report_id).first()
+    if report is not None:
+        notify_nearby_shelters_about_report(report)
+
+
+@job('match_report')
+def match_report(report_id):
+    """Pair a located report with lost/found reports of the same animal nearby"""
+    report = Report.objects.filter(pk=report_id).first()
+    if report is not None:
+        matching.match_report(report)
+
+
+@job('recognize_report_photo', max_attempts=2)
+def recognize_report_photo(report_id):
+    """Run AI image recognition on a report photo"""
+    report = Report.objects.filter(pk=report_id).first()
+    if report is None or not report.photo or report.ai_identified_type:
+        return
+
+    # Repeat uploads of the same photo are answered without decoding it
+    analysis = recognition_cache.analyze(report.photo.path)
+    animal_type, confidence = analysis['animal_type'], analysis['confidence']
+    if animal_type:
+        updates = {'ai_identified_type': animal_type, 'ai_confidence': confidence}
+        # Auto-fill animal type if not set
+        if not report.animal_type:
+            updates['animal_type'] = animal_type
+        Report.objects.filter(pk=report.pk).update(**updates)
+
+
+@job('hash_report_photo', max_attempts=2)
+def hash_report_photo(report_id):
+    """Perceptual-hash a report photo and flag it if it reposts an earlier report"""
+    report = Report.objects.filter(pk=report_id).first()
+    if report is None or not report.photo:
+        return
+
+    if not report.photo_hash:
+        report.photo_hash = photo_index.photo_hash(report.photo.path)
+    report.duplicate_of_id = photo_index.find_original_report_id(report)
+    # save() rather than update() so the photo index signal fires
+    report.save(update_fields=['photo_hash', 'duplicate_of'])
+
+
+@job('hash_animal_photo', max_attempts=2)
+def hash_animal_photo(animal_id):
+    """Perceptual-hash an animal photo"""
+    animal = Animal.objects.filter(pk=animal_id).first()
+    if animal is None or not animal.photo or animal.photo_hash:
+        return
+    animal.photo_hash = photo_index.photo_hash(animal.photo.path)
+    animal.save(update_fields=['photo_hash'])
+
+
+PHOTO_MODELS = {'report': Report, 'animal': Animal}
+
+
+@job('generate_photo_renditions', max_attempts=3)
+def generate_photo_renditions(kind, pk):
+    """Write the thumbnail and medium renditions of a report or animal photo"""
+    model = PHOTO_MODELS[kind]
+    obj = model.objects.filter(pk=pk).only('pk', 'photo', 'photo_renditions_ready').first()
+    if obj is None or not obj.photo or obj.photo_renditions_ready:
+        return
+    widths = renditions.generate_renditions(obj.photo)
+    # Skip the flag if the photo was replaced meanwhile; its own job handles it
+    model.objects.filter(pk=pk, photo=obj.photo.name).update(
+        photo_renditions_ready=True, photo_rendition_widths=widths
+    )
+
+
+@job('delete_photo_renditions', max_attempts=3)
+def delete_photo_renditions(kind, photo):
+    """Remove the renditions of a photo that was replaced or whose row was deleted"""
+    model = PHOTO_MODELS[kind]
+    if model.objects.filter(photo=photo).exists():
+        # Still in use (e.g. the same file was saved back)
+        return
+    renditions.delete_renditions(photo, model._meta.get_field('photo').storage)
+
+
+def schedule_session_purge():
+    """
+    Queue purge_expired_sessions unless one is already waiting
+    Called by the worker at startup; each run then queues the next one.
+    Returns the job, or None if nothing was queued.
+    """
+    interval = getattr(settings, 'SESSION_PURGE_INTERVAL', 6 * 3600)
+    if interval <= 0 or getattr(settings, 'RESCUE_JOBS_EAGER', False):
+        return None
+    if Job.objects.filter(name='purge_expired_sessions', status='pending').exists():
+        return None
+    return enqueue('purge_expired_sessions', delay=interval)
+
+
+@job('purge_expired_sessions', max_attempts=2)
+def purge_expired_sessions():
+    """Delete expired sessions (what `manage.py clearsessions` does), then reschedule"""
+    engine = import_module(settings.SESSION_ENGINE)
+    engine.SessionStore.clear_expired()
+    schedule_session_purge()
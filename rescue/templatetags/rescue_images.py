@@ -0,0 +1,62 @@
+"""
+Template tags for serving photo renditions (rescue/renditions.py)
+"""
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from ..renditions import RENDITIONS, WEBP_AVAILABLE, rendition_name
+
+register = template.Library()
+
+# Cards are at most ~400px wide; below 640px they span the screen
+CARD_SIZES = '(max-width: 640px) 100vw, 400px'
+
+HIDE_ON_ERROR = "this.style.display='none'; this.nextElementSibling.style.display='flex';"
+HIDE_PICTURE_ON_ERROR = "this.parentNode.style.display='none'; this.parentNode.nextElementSibling.style.display='flex';"
+
+
+def _srcset(photo, ext, widths):
+    """
+    Sources at the widths actually written; a rendition no wider than the
+    one before it (the original was small) would only repeat it, so it is left out
+    """
+    storage = photo.storage
+    entries, previous = [], 0
+    for rendition, nominal in sorted(RENDITIONS.items(), key=lambda item: item[1]):
+        # Photos processed before widths were recorded report the nominal ones
+        width = widths.get(rendition, nominal)
+        if width <= previous:
+            continue
+        previous = width
+        entries.append(f"{storage.url(rendition_name(photo.name, rendition, ext))} {width}w")
+    return ', '.join(entries)
+
+
+@register.simple_tag
+def responsive_photo(obj, alt='', rendition='thumb', sizes=CARD_SIZES):
+    """
+    <picture> with WebP and JPEG srcsets for obj.photo, or a plain <img> of
+    the original while its renditions are still being generated
+    The element hides itself on error to reveal the .no-image placeholder
+    that follows it, like the plain <img> markup it replaces.
+    """
+    photo = obj.photo
+    if not getattr(obj, 'photo_renditions_ready', False):
+        return format_html(
+            '<img src="{}" alt="{}" loading="lazy" onerror="{}">',
+            photo.url, alt, HIDE_ON_ERROR,
+        )
+
+    widths = getattr(obj, 'photo_rendition_widths', None) or {}
+    sources = []
+    if WEBP_AVAILABLE:
+        sources.append((_srcset(photo, 'webp', widths), sizes))
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy" onerror="{}"></picture>',
+        format_html_join('', '<source type="image/webp" srcset="{}" sizes="{}">', sources),
+        photo.storage.url(rendition_name(photo.name, rendition, 'jpg')),
+        _srcset(photo, 'jpg', widths),
+        sizes,
+        alt,
+        HIDE_PICTURE_ON_ERROR,
+    )
@@ -0,0 +1,196 @@
+"""
+Regression tests for the list pages' database access
+"""
+import random
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from PIL import Image
+
+from . import matching, photo_index
+from .identity import user_cache_key
+from .models import Job, Notification, Report, ReportMatch, Shelter
+from .notification_utils import create_notifications, mark_notifications_read
+from .query_checks import (
+    FORBIDDEN, PAGES, Fixture, analyze, hot_queries, plan_problems, render_page, seed_plan_data,
+)
+
+
+class QueryPlanTests(TestCase):
+    """Each hot list query must use its index, with no full scan or temporary sort"""
+
+    ROWS = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shelter = seed_plan_data(cls.ROWS, random.Random(42))
+
+    def setUp(self):
+        if connection.vendor not in FORBIDDEN:
+            self.skipTest(f"No plan expectations for {connection.vendor}")
+        analyze(connection.vendor)
+
+    def test_list_queries_use_their_indexes(self):
+        for label, queryset, expected in hot_queries(self.shelter):
+            with self.subTest(label):
+                plan = queryset.explain()
+                _, problems = plan_problems(connection.vendor, label, plan, expected)
+                self.assertEqual(problems, [], f"{label}:\n{plan}")
+
+
+class QueryBudgetTests(TestCase):
+    """No page issues more queries as its lists grow, or more than MAX_QUERIES"""
+
+    MAX_QUERIES = 15
+
+    def setUp(self):
+        self.fixture = Fixture()
+        # The rollback fires no invalidation, and the ids are reused
+        self.addCleanup(lambda: cache.delete_many([user_cache_key(pk) for pk in self.fixture.user_ids]))
+        self.fixture.grow(2)
+
+    def count_queries(self, page):
+        url, response, queries = render_page(self.fixture, *page)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        before = {label: self.count_queries(page) for label, *page in PAGES}
+        self.fixture.grow(8)
+        for label, *page in PAGES:
+            with self.subTest(label):
+                after = self.count_queries(page)
+                self.assertLessEqual(after, before[label], 'grows with rows')
+                self.assertLessEqual(after, self.MAX_QUERIES, 'over budget')
+
+
+class UnreadCounterTests(TestCase):
+    """Saves and deletes outside notification_utils keep the unread counter right"""
+
+    @classmethod
+    def setUpTestData(cls):
+        shelter_fields = {'address': '1 Main St', 'city': 'Pune', 'state': 'MH', 'zip_code': '411001', 'phone': '000'}
+        cls.shelter, cls.other = [
+            Shelter.objects.create(
+                name=name, email=f'{name}@example.com', user=User.objects.create(username=name), **shelter_fields
+            )
+            for name in ('first', 'second')
+        ]
+        cls.report = Report.objects.create(
+            report_type='stray', animal_type='dog', description='Seeded', location='Somewhere',
+            city='Pune', state='MH', zip_code='411001', reported_by=User.objects.create(username='reporter'),
+        )
+
+    def notify(self, count=1, **fields):
+        return create_notifications([
+            Notification(notification_type='new_report', shelter=self.shelter, title='Report', message='Seeded', **fields)
+            for _ in range(count)
+        ])
+
+    def assertCounts(self, first, second=0):
+        counts = dict(Shelter.objects.values_list('pk', 'unread_notification_count'))
+        self.assertEqual((counts[self.shelter.pk], counts[self.other.pk]), (first, second))
+
+    def test_single_create_counts(self):
+        Notification.objects.create(notification_type='new_report', shelter=self.shelter, title='T', message='M')
+        Notification.objects.create(notification_type='new_report', shelter=self.shelter, title='T', message='M', is_read=True)
+        self.assertCounts(1)
+
+    def test_edits_move_the_counter(self):
+        notification = Notification.objects.get(pk=self.notify()[0].pk)
+        notification.is_read = True
+        notification.save()
+        self.assertCounts(0)
+        notification.is_read = False
+        notification.save()
+        self.assertCounts(1)
+        notification.shelter = self.other
+        notification.save()
+        self.assertCounts(0, 1)
+        notification.title = 'Edited'
+        notification.save(update_fields=['title'])
+        self.assertCounts(0, 1)
+
+    def test_deletes_count_down(self):
+        read, unread = self.notify(2)
+        mark_notifications_read(self.shelter, [read.pk])
+        self.notify(2, report=self.report)
+        self.assertCounts(3)
+        Notification.objects.get(pk=read.pk).delete()
+        Notification.objects.get(pk=unread.pk).delete()
+        self.assertCounts(2)
+        # Cascades from the report send post_delete for each notification
+        self.report.delete()
+        self.assertCounts(0)
+
+
+class DegeneratePhotoHashTests(TestCase):
+    """Blank and flat photos are never matched to each other"""
+
+    def setUp(self):
+        photo_index.reset_photo_indexes()
+        self.addCleanup(photo_index.reset_photo_indexes)
+        self.user = User.objects.create(username='reporter')
+
+    def report(self, value):
+        return Report.objects.create(
+            report_type='stray', animal_type='dog', description='Seeded', location='Somewhere',
+            city='Pune', state='MH', zip_code='411001', reported_by=self.user, photo_hash=value,
+        )
+
+    def test_flat_photos_hash_to_degenerate_values(self):
+        value = photo_index.dhash(Image.new('RGB', (64, 64), 'white'))
+        self.assertFalse(photo_index.is_distinctive(value))
+
+    def test_degenerate_hashes_are_not_reposts(self):
+        for value in ('0000000000000000', 'ffffffffffffffff', '0000000000000101'):
+            with self.subTest(value):
+                self.report(value)
+                duplicate = self.report(value)
+                photo_index.reset_photo_indexes()
+                self.assertIsNone(photo_index.find_original_report_id(duplicate))
+
+    def test_distinctive_hashes_still_match(self):
+        original = self.report('9a3c5e7f10b2d486')
+        self.assertEqual(photo_index.find_original_report_id(self.report('9a3c5e7f10b2d487')), original.pk)
+
+
+class ClosedReportMatchTests(TestCase):
+    """Resolved and closed reports drop out of lost/found matches"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create(username='reporter')
+        fields = {
+            'animal_type': 'dog', 'location': 'MI Road', 'city': 'Jaipur', 'state': 'RJ', 'zip_code': '302001',
+            'latitude': 26.9124, 'longitude': 75.7873, 'reported_by': user,
+        }
+        cls.lost = Report.objects.create(report_type='lost', description='Brown dog with a red collar', **fields)
+        cls.found = Report.objects.create(report_type='found', description='Brown dog, red collar', **fields)
+
+    def setUp(self):
+        # The first call only fills the found report's grid cell and week keys
+        matching.match_report(self.found)
+        self.assertEqual(len(matching.match_report(self.lost)), 1)
+
+    def test_closing_a_report_deletes_its_matches(self):
+        self.found.status = 'resolved'
+        self.found.save()
+        self.assertFalse(ReportMatch.objects.exists())
+        self.assertEqual(matching.match_report(self.lost), [])
+
+    def test_matches_skip_counterparts_closed_by_queryset_update(self):
+        Report.objects.filter(pk=self.found.pk).update(status='closed')
+        self.assertEqual(matching.matches_for(self.lost), [])
+        self.assertEqual([m['report'].pk for m in matching.matches_for(self.found)], [self.lost.pk])
+
+    def test_reopening_a_report_queues_matching(self):
+        found = Report.objects.get(pk=self.found.pk)
+        found.status = 'closed'
+        found.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            found.status = 'open'
+            found.save()
+        self.assertTrue(Job.objects.filter(name='match_report', payload={'report_id': found.pk}).exists())
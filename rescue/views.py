@@ -2,30 +2,47 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
-from django.core.paginator import Paginator
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+from django.db.models import Prefetch
+from django.db.models.functions import Left
 import os
 
-from .models import Animal, Report, AdoptionRequest, Shelter, Update
+from .models import Animal, Report, AdoptionRequest, Shelter, Update, Notification
 from .forms import (
     UserRegistrationForm, AnimalForm, ReportForm, 
     AdoptionRequestForm, ShelterForm, UpdateForm
 )
-from .ai_recognition import recognizer
+from .db_router import reads_from_replica
+from .identity import BACKEND
+from .jobs import enqueue
+from .pagination import KeysetPaginator
+from . import matching, photo_index
+from .search import search as full_text_search
 from .notification_utils import (
-    notify_nearby_shelters_about_report,
+    mark_notifications_read,
     notify_shelter_about_adoption_request,
     notify_shelter_about_report_update
 )
 
+# Columns the card grids render; long text fields stay in the database
+ANIMAL_CARD_FIELDS = (
+    'id', 'name', 'animal_type', 'breed', 'age', 'status', 'photo', 'photo_renditions_ready', 'photo_rendition_widths',
+    'created_at',
+)
+REPORT_CARD_FIELDS = (
+    'id', 'report_type', 'animal_type', 'location', 'city', 'state', 'status', 'location_status',
+    'photo', 'photo_renditions_ready', 'photo_rendition_widths', 'ai_identified_type', 'ai_confidence', 'created_at',
+)
+NOTIFICATION_FIELDS = (
+    'id', 'notification_type', 'title', 'message', 'is_read', 'created_at', 'report', 'adoption_request',
+)
 
+
+@reads_from_replica
 def home(request):
     """Home page with featured animals and recent reports"""
     try:
-        featured_animals = Animal.objects.filter(status='available')[:6]
-        recent_reports = Report.objects.filter(status='open')[:6]
+        featured_animals = Animal.objects.filter(status='available').only(*ANIMAL_CARD_FIELDS)[:6]
+        recent_reports = Report.objects.filter(status='open').only(*REPORT_CARD_FIELDS)[:6]
     except Exception as e:
         # If database tables don't exist, show empty lists
         import logging
@@ -51,9 +68,6 @@ def register(request):
             
             # If NGO is selected, create shelter profile
             if user_type == 'ngo':
-                from geopy.geocoders import Nominatim
-                from geopy.exc import GeocoderTimedOut, GeocoderServiceError
-                
                 # Set first_name and last_name to empty or use shelter name for NGOs
                 if not user.first_name and not user.last_name:
                     user.first_name = form.cleaned_data.get('shelter_name', '')[:30]
@@ -72,23 +86,14 @@ def register(request):
                     website=form.cleaned_data.get('shelter_website', '')
                 )
                 
-                # Geocoding for location
-                try:
-                    geolocator = Nominatim(user_agent="animal_rescue")
-                    location_str = f"{shelter.address}, {shelter.city}, {shelter.state} {shelter.zip_code}"
-                    location = geolocator.geocode(location_str, timeout=10)
-                    if location:
-                        shelter.latitude = location.latitude
-                        shelter.longitude = location.longitude
-                        shelter.save()
-                except (GeocoderTimedOut, GeocoderServiceError):
-                    pass
+                # Geocoding runs in the background worker
+                enqueue('geocode_shelter', shelter_id=shelter.pk)
                 
-                login(request, user)
+                login(request, user, backend=BACKEND)
                 messages.success(request, 'NGO registration successful! Your shelter profile has been created.')
                 return redirect('dashboard')
             else:
-                login(request, user)
+                login(request, user, backend=BACKEND)
                 messages.success(request, 'Registration successful!')
                 return redirect('home')
     else:
@@ -96,9 +101,10 @@ def register(request):
     return render(request, 'rescue/register.html', {'form': form})
 
 
+@reads_from_replica
 def animal_list(request):
     """List all available animals with filters"""
-    animals = Animal.objects.filter(status='available')
+    animals = Animal.objects.filter(status='available').only(*ANIMAL_CARD_FIELDS)
     
     # Filters
     animal_type = request.GET.get('type', '')
@@ -107,15 +113,11 @@ def animal_list(request):
     if animal_type:
         animals = animals.filter(animal_type=animal_type)
     if search:
-        animals = animals.filter(
-            Q(name__icontains=search) |
-            Q(breed__icontains=search) |
-            Q(description__icontains=search)
-        )
+        # Ranked full-text match on name, breed and description (rescue/search.py)
+        animals = full_text_search(animals, search)
     
-    paginator = Paginator(animals, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    ordering = ('-search_rank', '-created_at', '-id') if search else ('-created_at', '-id')
+    page_obj = KeysetPaginator(animals, 12, ordering).get_page(request.GET.get('cursor'))
     
     context = {
         'page_obj': page_obj,
@@ -125,18 +127,27 @@ def animal_list(request):
     return render(request, 'rescue/animal_list.html', context)
 
 
+@reads_from_replica
 def animal_detail(request, pk):
     """Animal detail page"""
-    animal = get_object_or_404(Animal, pk=pk)
+    animal = get_object_or_404(
+        Animal.objects.select_related('shelter').prefetch_related(
+            Prefetch('updates', queryset=Update.objects.select_related('created_by'))
+        ),
+        pk=pk,
+    )
     adoption_request = None
     if request.user.is_authenticated:
         adoption_request = AdoptionRequest.objects.filter(
             animal=animal, user=request.user
         ).first()
     
+    can_manage = request.identity.manages(animal.shelter_id)
+    
     context = {
         'animal': animal,
         'adoption_request': adoption_request,
+        'can_manage': can_manage,
     }
     return render(request, 'rescue/animal_detail.html', context)
 
@@ -149,77 +160,82 @@ def report_create(request):
         if form.is_valid():
             report = form.save(commit=False)
             report.reported_by = request.user
-            
-            # AI Image Recognition
-            if report.photo:
-                animal_type, confidence = recognizer.recognize_animal(report.photo.path)
-                if animal_type:
-                    report.ai_identified_type = animal_type
-                    report.ai_confidence = confidence
-                    # Auto-fill animal type if not set
-                    if not report.animal_type:
-                        report.animal_type = animal_type
-            
-            # Geocoding for location
-            try:
-                geolocator = Nominatim(user_agent="animal_rescue")
-                location_str = f"{report.location}, {report.city}, {report.state} {report.zip_code}"
-                location = geolocator.geocode(location_str, timeout=10)
-                if location:
-                    report.latitude = location.latitude
-                    report.longitude = location.longitude
-            except (GeocoderTimedOut, GeocoderServiceError):
-                pass
-            
+            if form.photo_gps:
+                # A geotagged photo is more precise than the typed address and
+                # saves the geocoder round trip
+                report.latitude, report.longitude = form.photo_gps
+                report.location_status = 'located'
+            else:
+                report.location_status = 'pending'
             report.save()
             
-            # Notify nearby shelters about the new report
-            notify_nearby_shelters_about_report(report)
+            # AI recognition, geocoding and notifying nearby shelters run in
+            # the background worker; the report page shows "Locating…" until then.
+            # geocode_report skips the lookup for reports already located
+            if report.photo:
+                enqueue('recognize_report_photo', report_id=report.pk)
+                enqueue('hash_report_photo', report_id=report.pk)
+                enqueue('generate_photo_renditions', kind='report', pk=report.pk)
+            enqueue('geocode_report', report_id=report.pk)
             
-            messages.success(request, 'Report submitted successfully! Nearby NGOs have been notified.')
+            messages.success(request, 'Report submitted successfully! Nearby NGOs will be notified shortly.')
             return redirect('report_detail', pk=report.pk)
     else:
         form = ReportForm()
     return render(request, 'rescue/report_form.html', {'form': form, 'title': 'Report Animal'})
 
 
+@reads_from_replica
 def report_list(request):
     """List all reports"""
-    reports = Report.objects.all()
+    # Cards show the first 20 words of the description; fetch only its start
+    reports = Report.objects.only(*REPORT_CARD_FIELDS).annotate(description_preview=Left('description', 300))
     
     # Filters
     report_type = request.GET.get('type', '')
     animal_type = request.GET.get('animal_type', '')
     city = request.GET.get('city', '')
+    q = request.GET.get('q', '')
     
     if report_type:
         reports = reports.filter(report_type=report_type)
     if animal_type:
         reports = reports.filter(animal_type=animal_type)
-    if city:
-        reports = reports.filter(city__icontains=city)
+    if q or city:
+        # Ranked full-text match on description, location and city (rescue/search.py)
+        reports = full_text_search(reports, q, city=city)
     
-    paginator = Paginator(reports, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    ordering = ('-search_rank', '-created_at', '-id') if (q or city) else ('-created_at', '-id')
+    page_obj = KeysetPaginator(reports, 12, ordering).get_page(request.GET.get('cursor'))
     
     context = {
         'page_obj': page_obj,
         'report_type': report_type,
         'animal_type': animal_type,
         'city': city,
+        'q': q,
     }
     return render(request, 'rescue/report_list.html', context)
 
 
+@reads_from_replica
 def report_detail(request, pk):
     """Report detail page"""
-    report = get_object_or_404(Report, pk=pk)
-    updates = report.updates.all()
+    report = get_object_or_404(Report.objects.select_related('reported_by'), pk=pk)
+    updates = report.updates.select_related('created_by')
+    
+    # Other reports and shelter animals with a similar photo
+    similar_reports = photo_index.similar_objects('report', report.photo_hash, exclude_pk=report.pk)
+    similar_animals = photo_index.similar_objects('animal', report.photo_hash)
+    # Possible lost/found counterparts, precomputed by the matcher
+    matches = matching.matches_for(report)
     
     context = {
         'report': report,
         'updates': updates,
+        'similar_reports': similar_reports,
+        'similar_animals': similar_animals,
+        'matches': matches,
     }
     return render(request, 'rescue/report_detail.html', context)
 
@@ -257,8 +273,8 @@ def dashboard(request):
     user = request.user
     
     # Check if user is a shelter
-    is_shelter = hasattr(user, 'shelter')
-    shelter = user.shelter if is_shelter else None
+    is_shelter = request.identity.is_shelter
+    shelter = request.identity.shelter
     
     context = {
         'is_shelter': is_shelter,
@@ -267,18 +283,14 @@ def dashboard(request):
     
     if is_shelter:
         # Shelter dashboard
-        from .models import Notification
-        animals = Animal.objects.filter(shelter=shelter)
+        animals = Animal.objects.filter(shelter=shelter).only(*ANIMAL_CARD_FIELDS)
         adoption_requests = AdoptionRequest.objects.filter(
             animal__shelter=shelter
-        ).order_by('-created_at')[:10]
+        ).select_related('animal', 'user').order_by('-created_at')[:10]
         notifications = Notification.objects.filter(
             shelter=shelter
-        ).order_by('-created_at')[:10]
-        unread_count = Notification.objects.filter(
-            shelter=shelter,
-            is_read=False
-        ).count()
+        ).only(*NOTIFICATION_FIELDS).order_by('-created_at')[:10]
+        unread_count = shelter.unread_notification_count
         
         context.update({
             'animals': animals,
@@ -288,8 +300,8 @@ def dashboard(request):
         })
     else:
         # Regular user dashboard
-        user_reports = Report.objects.filter(reported_by=user)[:10]
-        user_adoption_requests = AdoptionRequest.objects.filter(user=user)[:10]
+        user_reports = Report.objects.filter(reported_by=user).only(*REPORT_CARD_FIELDS)[:10]
+        user_adoption_requests = AdoptionRequest.objects.filter(user=user).select_related('animal__shelter')[:10]
         
         context.update({
             'user_reports': user_reports,
@@ -302,7 +314,7 @@ def dashboard(request):
 @login_required
 def shelter_create(request):
     """Create shelter profile"""
-    if hasattr(request.user, 'shelter'):
+    if request.identity.is_shelter:
         messages.info(request, 'You already have a shelter profile.')
         return redirect('dashboard')
     
@@ -311,19 +323,11 @@ def shelter_create(request):
         if form.is_valid():
             shelter = form.save(commit=False)
             shelter.user = request.user
-            
-            # Geocoding
-            try:
-                geolocator = Nominatim(user_agent="animal_rescue")
-                location_str = f"{shelter.address}, {shelter.city}, {shelter.state} {shelter.zip_code}"
-                location = geolocator.geocode(location_str, timeout=10)
-                if location:
-                    shelter.latitude = location.latitude
-                    shelter.longitude = location.longitude
-            except (GeocoderTimedOut, GeocoderServiceError):
-                pass
-            
+            shelter.location_status = 'pending'
             shelter.save()
+            
+            # Geocoding runs in the background worker
+            enqueue('geocode_shelter', shelter_id=shelter.pk)
             messages.success(request, 'Shelter profile created!')
             return redirect('dashboard')
     else:
@@ -335,7 +339,7 @@ def shelter_create(request):
 @login_required
 def animal_create(request):
     """Create animal profile (for shelters)"""
-    if not hasattr(request.user, 'shelter'):
+    if not request.identity.is_shelter:
         messages.error(request, 'You must be a shelter to add animals.')
         return redirect('dashboard')
     
@@ -343,9 +347,12 @@ def animal_create(request):
         form = AnimalForm(request.POST, request.FILES)
         if form.is_valid():
             animal = form.save(commit=False)
-            animal.shelter = request.user.shelter
+            animal.shelter = request.identity.shelter
             animal.created_by = request.user
             animal.save()
+            if animal.photo:
+                enqueue('hash_animal_photo', animal_id=animal.pk)
+                enqueue('generate_photo_renditions', kind='animal', pk=animal.pk)
             messages.success(request, 'Animal profile created!')
             return redirect('animal_detail', pk=animal.pk)
     else:
@@ -359,14 +366,23 @@ def animal_edit(request, pk):
     """Edit animal profile"""
     animal = get_object_or_404(Animal, pk=pk)
     
-    if not hasattr(request.user, 'shelter') or animal.shelter != request.user.shelter:
+    if not request.identity.manages(animal.shelter_id):
         messages.error(request, 'You do not have permission to edit this animal.')
         return redirect('animal_detail', pk=pk)
     
     if request.method == 'POST':
         form = AnimalForm(request.POST, request.FILES, instance=animal)
         if form.is_valid():
-            form.save()
+            animal = form.save(commit=False)
+            if 'photo' in form.changed_data:
+                # Re-process the new photo (or drop stale data if it was cleared)
+                animal.photo_hash = ''
+                animal.photo_renditions_ready = False
+                animal.photo_rendition_widths = {}
+            animal.save()
+            if 'photo' in form.changed_data and animal.photo:
+                enqueue('hash_animal_photo', animal_id=animal.pk)
+                enqueue('generate_photo_renditions', kind='animal', pk=animal.pk)
             messages.success(request, 'Animal profile updated!')
             return redirect('animal_detail', pk=animal.pk)
     else:
@@ -378,9 +394,9 @@ def animal_edit(request, pk):
 @login_required
 def adoption_request_manage(request, pk):
     """Manage adoption request (approve/reject)"""
-    adoption_request = get_object_or_404(AdoptionRequest, pk=pk)
+    adoption_request = get_object_or_404(AdoptionRequest.objects.select_related('animal', 'user'), pk=pk)
     
-    if not hasattr(request.user, 'shelter') or adoption_request.animal.shelter != request.user.shelter:
+    if not request.identity.manages(adoption_request.animal.shelter_id):
         messages.error(request, 'You do not have permission to manage this request.')
         return redirect('dashboard')
     
@@ -410,7 +426,7 @@ def update_create(request, animal_pk=None, report_pk=None):
     
     if animal_pk:
         animal = get_object_or_404(Animal, pk=animal_pk)
-        if hasattr(request.user, 'shelter') and animal.shelter != request.user.shelter:
+        if request.identity.is_shelter and not request.identity.manages(animal.shelter_id):
             messages.error(request, 'You do not have permission to create updates for this animal.')
             return redirect('animal_detail', pk=animal_pk)
     
@@ -448,17 +464,20 @@ def update_create(request, animal_pk=None, report_pk=None):
 @login_required
 def notifications(request):
     """View all notifications for a shelter"""
-    if not hasattr(request.user, 'shelter'):
+    if not request.identity.is_shelter:
         messages.error(request, 'You must be a shelter to view notifications.')
         return redirect('dashboard')
     
-    from .models import Notification
-    shelter = request.user.shelter
-    notifications_list = Notification.objects.filter(shelter=shelter).order_by('-created_at')
-    unread_count = Notification.objects.filter(shelter=shelter, is_read=False).count()
+    shelter = request.identity.shelter
+    notifications_list = Notification.objects.filter(shelter=shelter).select_related(
+        'adoption_request'
+    ).only(*NOTIFICATION_FIELDS, 'adoption_request__animal')
+    page_obj = KeysetPaginator(notifications_list, 20, count_limit=0).get_page(request.GET.get('cursor'))
+    unread_count = shelter.unread_notification_count
     
     context = {
-        'notifications': notifications_list,
+        'notifications': page_obj,
+        'page_obj': page_obj,
         'unread_count': unread_count,
     }
     return render(request, 'rescue/notifications.html', context)
@@ -467,15 +486,13 @@ def notifications(request):
 @login_required
 def notification_mark_read(request, notification_id):
     """Mark a notification as read"""
-    from .models import Notification
     notification = get_object_or_404(Notification, pk=notification_id)
     
-    if not hasattr(request.user, 'shelter') or notification.shelter != request.user.shelter:
+    if not request.identity.manages(notification.shelter_id):
         messages.error(request, 'You do not have permission to access this notification.')
         return redirect('dashboard')
     
-    notification.is_read = True
-    notification.save()
+    mark_notifications_read(request.identity.shelter, [notification.pk])
     
     return redirect('notifications')
 
@@ -483,12 +500,11 @@ def notification_mark_read(request, notification_id):
 @login_required
 def notification_mark_all_read(request):
     """Mark all notifications as read"""
-    if not hasattr(request.user, 'shelter'):
+    if not request.identity.is_shelter:
         messages.error(request, 'You must be a shelter.')
         return redirect('dashboard')
     
-    from .models import Notification
-    Notification.objects.filter(shelter=request.user.shelter, is_read=False).update(is_read=True)
+    mark_notifications_read(request.identity.shelter)
     messages.success(request, 'All notifications marked as read.')
     return redirect('notifications')
 